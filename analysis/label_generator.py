@@ -1,23 +1,121 @@
+import os
+import numpy as np
 import pandas as pd
 import logging
 
+def expiry_horizon(config):
+    """Número de velas que cubre la expiración usada por Trader."""
+    return max(1, int(config.trade_duration // config.candle_size))
+
+def label_columns(horizon, suffix=None):
+    """Nombres de las columnas binaria y de tres clases para un horizonte."""
+    name = suffix if suffix is not None else str(horizon)
+    return f"label_{name}", f"label3_{name}"
+
+def compute_labels(data, horizons, threshold_call, threshold_put, expiry=None):
+    """
+    Calcula en una sola pasada vectorizada las etiquetas de todos los horizontes.
+    - label_{h}: 1 si el cierre dentro de h velas es mayor al actual, 0 si no.
+    - label3_{h}: 1 (call) si el movimiento supera threshold_call, -1 (put) si es
+      menor que threshold_put y 0 (neutral) en otro caso.
+    Las filas cuyo futuro aún no se conoce quedan en NaN.
+    """
+    data = data.sort_values('timestamp').reset_index(drop=True)
+    close = data['close'].astype(np.float64).values
+    n = len(close)
+    steps = sorted(set(horizons) | ({expiry} if expiry else set()))
+    labels = {'timestamp': data['timestamp'].values}
+
+    for h in steps:
+        future = np.full(n, np.nan)
+        if h < n:
+            future[:n - h] = close[h:]
+        known = ~np.isnan(future)
+        move = future - close
+        binary = np.where(known, (move > 0).astype(np.float64), np.nan)
+        three = np.where(move > threshold_call, 1.0, np.where(move < threshold_put, -1.0, 0.0))
+        three = np.where(known, three, np.nan)
+        columns = []
+        if h in horizons:
+            columns.append(label_columns(h))
+        if h == expiry:
+            columns.append(label_columns(h, suffix="exp"))
+        for binary_col, three_col in columns:
+            labels[binary_col] = binary
+            labels[three_col] = three
+    return pd.DataFrame(labels)
+
 class LabelGenerator:
     def __init__(self, config):
         self.config = config
         self.data_file = self.config.csv_path
+        self.labels_file = self.config.labels_path
+        self.horizons = list(self.config.label_horizons)
+        self.expiry = expiry_horizon(self.config)
         self.logger = logging.getLogger()
 
-    def generate_labels(self):
+    def _compute(self, data):
+        return compute_labels(data, self.horizons, self.config.threshold_call,
+                              self.config.threshold_put, expiry=self.expiry)
+
+    def load_labels(self):
+        if os.path.exists(self.labels_file) and os.path.getsize(self.labels_file) > 0:
+            return pd.read_csv(self.labels_file)
+        return pd.DataFrame()
+
+    def generate_labels(self, data=None):
+        """
+        Genera las etiquetas multi-horizonte y las guarda en un archivo propio,
+        indexado por timestamp, sin modificar las velas originales.
+        Solo se recalculan las filas nuevas o cuyo futuro no se conocía todavía.
+        """
         try:
-            data = pd.read_csv(self.data_file)
+            if data is None:
+                data = pd.read_csv(self.data_file)
+            if 'timestamp' not in data.columns and 'from' in data.columns:
+                data = data.rename(columns={'from': 'timestamp'})
             if len(data) < 2:
                 self.logger.warning("ℹ️ Insuficientes datos para generar etiquetas.")
-                return False
-            data['label'] = (data['close'].shift(-1) > data['close']).astype(int)
-            data = data[:-1]
-            data.to_csv(self.data_file, index=False)
-            self.logger.info(f"✅ Etiquetas generadas en {self.data_file}")
-            return True
+                return pd.DataFrame()
+            data = data.drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp').reset_index(drop=True)
+
+            existing = self.load_labels()
+            expected = ['timestamp'] + [c for h in self.horizons for c in label_columns(h)] + list(label_columns(self.expiry, suffix="exp"))
+            if existing.empty or set(existing.columns) != set(expected):
+                labels = self._compute(data)
+            else:
+                # Las etiquetas completas se conservan; se recalcula desde la primera incompleta
+                complete = existing.dropna()
+                known = complete['timestamp'][complete['timestamp'].isin(data['timestamp'])]
+                last_complete = known.max() if not known.empty else None
+                if last_complete is None:
+                    labels = self._compute(data)
+                else:
+                    start = max(0, int(np.searchsorted(data['timestamp'].values, last_complete, side='right')))
+                    if start >= len(data):
+                        self.logger.info("ℹ️ Etiquetas al día, no hay velas nuevas.")
+                        return complete.reset_index(drop=True)
+                    tail = self._compute(data.iloc[start:])
+                    labels = pd.concat([complete, tail], ignore_index=True)
+                    labels = labels.drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp').reset_index(drop=True)
+                    self.logger.info(f"➕ Etiquetas actualizadas para {len(tail)} velas nuevas o pendientes")
+
+            labels.to_csv(self.labels_file, index=False)
+            self.logger.info(f"✅ Etiquetas generadas en {self.labels_file}")
+            return labels
         except Exception as e:
             self.logger.error(f"❌ Error al generar etiquetas: {e}")
-            return False
\ No newline at end of file
+            return pd.DataFrame()
+
+    def attach_labels(self, data, horizon=1, labels=None):
+        """Une a las velas la etiqueta binaria del horizonte pedido como columna 'label'."""
+        if labels is None:
+            labels = self.load_labels()
+        column = label_columns(horizon)[0] if horizon != "exp" else label_columns(self.expiry, suffix="exp")[0]
+        if labels.empty or column not in labels.columns:
+            return data
+        data = data.drop(columns=['label'], errors='ignore')
+        merged = data.merge(labels[['timestamp', column]], on='timestamp', how='left')
+        merged = merged.dropna(subset=[column]).rename(columns={column: 'label'})
+        merged['label'] = merged['label'].astype(int)
+        return merged
@@ -1,15 +1,23 @@
+import os
 import numpy as np
 import pandas as pd
 import logging
 import tensorflow as tf
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Input, Dropout
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras import backend as K
 from sklearn.preprocessing import MinMaxScaler
 import talib
 import time
-from joblib import dump, load
+from analysis.label_generator import compute_labels, label_columns
+from analysis.pattern_scanner import PatternScanner, PATTERN_FEATURES
+from analysis.model_variants import build_network, distill, quantize, TFLiteModel
+from analysis.model_bundle import save_bundle, load_bundle, BundleError
+from data.timeframes import timeframe_columns, timeframe_column, timeframe_label
+
+# Esquema de columnas de extract_features_df (se guarda y valida en el bundle)
+FEATURE_NAMES = ["close", "roll_mean", "close_minus_mean", "roll_std", "return",
+                 "rsi5", "ema10", "volume_mean", "macd", "bb_position"]
+PATTERN_FEATURE_NAMES = ["pattern_score", "pattern_bullish", "pattern_bearish"]
 
 def custom_binary_crossentropy(y_true, y_pred):
     epsilon = 1e-7
@@ -21,24 +29,52 @@ class MLModel:
         self.config = config
         self.logger = logging.getLogger()
         self.model = None
+        self.tflite_model = None
+        self.architecture = getattr(config, 'model_architecture', 'lstm')
+        self.quantization = getattr(config, 'model_quantization', 'none')
         self.scaler = MinMaxScaler()
         self.sequence_length = 10
         self.input_features = 10
+        self.feature_names = list(FEATURE_NAMES)
+        self.pattern_scanner = None
+        if getattr(config, 'use_pattern_features', False):
+            self.pattern_scanner = PatternScanner(config.candle_patterns)
+            self.input_features += PATTERN_FEATURES
+            self.feature_names += PATTERN_FEATURE_NAMES
+        self.timeframes = []
+        if getattr(config, 'use_mtf_features', False):
+            self.timeframes = list(config.timeframes)
+            self.input_features += 2 * len(self.timeframes)
+            for timeframe in self.timeframes:
+                self.feature_names += [f"ret_vs_close_{timeframe_label(timeframe)}", f"range_{timeframe_label(timeframe)}"]
+        self.bundle = None
         self.last_train_time = 0
         self.retrain_interval = 3 * 3600
 
-    def build_model(self):
-        self.model = Sequential([
-            Input(shape=(self.sequence_length, self.input_features)),
-            LSTM(100, return_sequences=True),
-            LSTM(100),
-            Dense(50, activation='relu'),
-            Dropout(0.2),
-            Dense(1, activation='sigmoid')
-        ])
-        optimizer = Adam(learning_rate=0.0001, clipnorm=1.0)
-        self.model.compile(optimizer=optimizer, loss=custom_binary_crossentropy, metrics=['accuracy'])
-        self.logger.info("🧠 Modelo LSTM creado con éxito.")
+    def build_model(self, architecture=None):
+        architecture = architecture or self.architecture
+        # LSTM original o variantes compactas para CPU (GRU, convolución temporal o alumno destilado)
+        model = build_network(architecture, self.sequence_length, self.input_features)
+        optimizer = Adam(learning_rate=0.0001 if architecture == "lstm" else 0.001, clipnorm=1.0)
+        model.compile(optimizer=optimizer, loss=custom_binary_crossentropy, metrics=['accuracy'])
+        self.model = model
+        self.logger.info(f"🧠 Modelo {architecture.upper()} creado con éxito.")
+        return model
+
+    def _load_teacher(self, X, y, data_range):
+        """LSTM maestro para la destilación: el bundle LSTM guardado si existe, si no se entrena uno."""
+        try:
+            bundle = load_bundle(self.config.teacher_bundle_dir, expected_schema=self.feature_names,
+                                 expected_sequence_length=self.sequence_length)
+            teacher = bundle.apply_weights(self.build_model("lstm"))
+            self.logger.info(f"📦 Maestro LSTM {bundle.version} cargado desde {self.config.teacher_bundle_dir}")
+        except (BundleError, OSError, ValueError):
+            self.logger.info("🎓 No hay maestro LSTM guardado; entrenando uno para la destilación.")
+            teacher = self.build_model("lstm")
+            teacher.fit(X, y, epochs=50, batch_size=32, validation_split=0.2, verbose=1)
+            save_bundle(self.config.teacher_bundle_dir, teacher, self.scaler, self.feature_names,
+                        self.sequence_length, "lstm", data_range)
+        return teacher
 
     def extract_features_df(self, data):
         data = data.sort_values('timestamp').reset_index(drop=True)
@@ -78,15 +114,35 @@ class MLModel:
             macd,
             bb_position
         ])
+        if self.pattern_scanner is not None:
+            features = np.column_stack([features, self.pattern_scanner.scan(data).features()])
+        if self.timeframes:
+            features = np.column_stack([features, self._timeframe_features(data, prices)])
         features = np.nan_to_num(features, nan=0.0)
         return features
 
+    def _timeframe_features(self, data, prices):
+        """Retorno frente al cierre y rango relativo de la última vela cerrada de cada marco mayor."""
+        missing = [timeframe for timeframe in self.timeframes if timeframe_column('close', timeframe) not in data.columns]
+        if missing:
+            # Histórico sin columnas de marcos mayores: backfill vectorizado
+            data = timeframe_columns(data, missing, self.config.candle_size)
+        columns = []
+        for timeframe in self.timeframes:
+            close_tf = data[timeframe_column('close', timeframe)].to_numpy(dtype=np.float64)
+            range_tf = data[timeframe_column('max', timeframe)].to_numpy(dtype=np.float64) - data[timeframe_column('min', timeframe)].to_numpy(dtype=np.float64)
+            columns.append((prices - close_tf) / (close_tf + 1e-6))
+            columns.append(range_tf / (close_tf + 1e-6))
+        return np.column_stack(columns)
+
     def prepare_training_data(self, data):
         data = data.sort_values('timestamp').reset_index(drop=True)
         if 'label' not in data.columns:
             self.logger.warning("Columna 'label' no encontrada. Generándola automáticamente.")
-            data['label'] = (data['close'].shift(-1) > data['close']).astype(int)
-            data = data[:-1]
+            labels = compute_labels(data, [1], self.config.threshold_call, self.config.threshold_put)
+            data['label'] = labels[label_columns(1)[0]].values
+            data = data.dropna(subset=['label']).reset_index(drop=True)
+            data['label'] = data['label'].astype(int)
         feature_matrix = self.extract_features_df(data)
         X, y = [], []
         for i in range(len(feature_matrix) - self.sequence_length):
@@ -107,32 +163,83 @@ class MLModel:
         if data.empty or len(data) < self.sequence_length + 1:
             self.logger.error("❌ Datos insuficientes para entrenar el modelo")
             return
-        if time.time() - self.last_train_time < self.retrain_interval and self.model is not None:
+        if (time.time() - self.last_train_time < self.retrain_interval
+                and (self.model is not None or self.tflite_model is not None)):
             self.logger.info("No es tiempo de reentrenar aún.")
             return
         X, y = self.prepare_training_data(data)
         if X is None or y is None:
             return
-        self.build_model()
-        self.model.fit(X, y, epochs=50, batch_size=32, validation_split=0.2, verbose=1)
-        self.model.save(self.config.model_path)
-        dump(self.scaler, f"{self.config.data_assets}_scaler.pkl")
+        data_range = {"rows": int(len(data)), "start": int(data['timestamp'].min()), "end": int(data['timestamp'].max())}
+        if self.architecture == "student":
+            teacher = self._load_teacher(X, y, data_range)
+            distill(teacher, self.build_model(), X, y, epochs=50)
+        else:
+            self.build_model()
+            self.model.fit(X, y, epochs=50, batch_size=32, validation_split=0.2, verbose=1)
+        # También sin cuantizar se sirve un TFLite (float32): el intérprete mapea el
+        # archivo en memoria y los procesos que cargan el mismo bundle comparten sus páginas
+        try:
+            content = quantize(self.model, self.quantization, representative=X)
+        except Exception as e:
+            if self.quantization != "none":
+                raise
+            self.logger.warning(f"⚠️ No se pudo convertir el modelo a TFLite; se servirá con Keras: {e}")
+            content = None
+        version = save_bundle(self.config.model_bundle_dir, self.model, self.scaler, self.feature_names,
+                              self.sequence_length, self.architecture, data_range,
+                              quantization=self.quantization, tflite_content=content)
         self.last_train_time = time.time()
-        self.logger.info(f"💾 Modelo entrenado y guardado en {self.config.model_path}")
+        self.logger.info(f"💾 Modelo entrenado y guardado en {self.config.model_bundle_dir}/{version}")
+        # Se recarga desde el bundle para servir exactamente lo que quedó en disco
+        self.load()
+
+    def load(self, version=None):
+        """
+        Carga de forma anticipada y validada el bundle del modelo (pesos, scaler y, si
+        existe, el modelo TFLite). Devuelve True si quedó listo.
+        """
+        try:
+            bundle = load_bundle(self.config.model_bundle_dir, version=version,
+                                 expected_schema=self.feature_names,
+                                 expected_sequence_length=self.sequence_length)
+            if bundle.manifest["architecture"] != self.architecture:
+                raise BundleError(f"El bundle es {bundle.manifest['architecture']}, se esperaba {self.architecture}")
+            if bundle.manifest["quantization"] != self.quantization:
+                raise BundleError(f"El bundle usa cuantización {bundle.manifest['quantization']}, se esperaba {self.quantization}")
+            self.scaler = bundle.scaler
+            self.tflite_model = TFLiteModel(path=bundle.tflite_path) if bundle.tflite_path else None
+            if self.tflite_model is None:
+                # Bundles sin TFLite: los pesos se copian a un modelo Keras propio
+                self.model = bundle.apply_weights(self.build_model(bundle.manifest["architecture"]))
+                # Predicción de calentamiento: traza el grafo antes del primer ciclo real
+                self.model(np.zeros((1, self.sequence_length, self.input_features), dtype=np.float32), training=False)
+            else:
+                # Se sirve solo el TFLite: no queda otra copia de los pesos en el proceso
+                self.model = None
+            self.bundle = bundle
+            self.last_train_time = bundle.created_at
+            self.logger.info(f"📦 Modelo {bundle.version} cargado desde {self.config.model_bundle_dir}")
+            return True
+        except (BundleError, OSError, ValueError) as e:
+            self.logger.warning(f"⚠️ No se pudo cargar el modelo: {e}")
+            return False
+
+    def is_stale(self):
+        """True si no hay modelo cargado o si su bundle supera el intervalo de reentrenamiento."""
+        return self.bundle is None or time.time() - self.bundle.created_at >= self.retrain_interval
+
+    def memory_bytes(self):
+        """Tamaño aproximado del modelo servido (parámetros float32 o archivo TFLite)."""
+        size = self.model.count_params() * 4 if self.model is not None else 0
+        if self.tflite_model is not None and self.bundle is not None and self.bundle.tflite_path:
+            size += os.path.getsize(self.bundle.tflite_path)
+        return size
 
     def predict(self, data):
-        if self.model is None:
-            try:
-                self.model = load_model(self.config.model_path, custom_objects={'custom_binary_crossentropy': custom_binary_crossentropy})
-                self.logger.info(f"📦 Modelo cargado desde {self.config.model_path}")
-            except Exception as e:
-                self.logger.error(f"❌ Error al cargar el modelo: {e}")
-                return None
-        if not hasattr(self.scaler, 'min_'):
-            try:
-                self.scaler = load(f"{self.config.data_assets}_scaler.pkl")
-            except Exception as e:
-                self.logger.error(f"❌ Error al cargar el scaler: {e}")
+        if self.tflite_model is None and self.model is None:
+            self.logger.warning("⚠️ Modelo no cargado al iniciar; cargando ahora.")
+            if not self.load(self.bundle.version if self.bundle is not None else None):
                 return None
         data = data.sort_values('timestamp').reset_index(drop=True)
         feature_matrix = self.extract_features_df(data)
@@ -142,5 +249,10 @@ class MLModel:
         X = feature_matrix[-self.sequence_length:]
         X = self.scaler.transform(X)
         X = X.reshape(1, self.sequence_length, self.input_features)
-        prediction = self.model.predict(X)
+        if self.tflite_model is not None:
+            prediction = self.tflite_model.predict(X)
+        else:
+            # Llamada directa: evita el coste fijo de model.predict para una sola muestra
+            # Entrada float32 de forma fija: sin conversiones ni retrazados por llamada
+            prediction = self.model(tf.convert_to_tensor(X, dtype=tf.float32), training=False).numpy()
         return "call" if prediction[0][0] > 0.5 else "put"
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+BUNDLE_FORMAT = 2  # 2: el hash cubre todos los artefactos servidos (pesos y TFLite)
+MANIFEST = "manifest.json"
+WEIGHTS = "weights.npy"
+TFLITE = "model.tflite"
+LATEST = "LATEST"
+
+logger = logging.getLogger()
+
+class BundleError(Exception):
+    """El bundle del modelo no existe, está corrupto o no coincide con el esquema actual."""
+
+def _scaler_params(scaler):
+    return {
+        "feature_range": list(scaler.feature_range),
+        "min_": scaler.min_.tolist(),
+        "scale_": scaler.scale_.tolist(),
+        "data_min_": scaler.data_min_.tolist(),
+        "data_max_": scaler.data_max_.tolist(),
+        "data_range_": scaler.data_range_.tolist(),
+        "n_samples_seen_": int(scaler.n_samples_seen_),
+    }
+
+def _restore_scaler(params):
+    scaler = MinMaxScaler(feature_range=tuple(params["feature_range"]))
+    for name in ("min_", "scale_", "data_min_", "data_max_", "data_range_"):
+        setattr(scaler, name, np.asarray(params[name], dtype=np.float64))
+    scaler.n_samples_seen_ = params["n_samples_seen_"]
+    scaler.n_features_in_ = len(params["min_"])
+    return scaler
+
+def _content_hash(path, description):
+    """Hash de la descripción y de cada artefacto que lista (description["artifacts"])."""
+    digest = hashlib.sha256()
+    for name in description["artifacts"]:
+        digest.update(name.encode())
+        with open(os.path.join(path, name), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    digest.update(json.dumps(description, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def save_bundle(directory, model, scaler, feature_schema, sequence_length, architecture,
+                data_range, quantization="none", tflite_content=None):
+    """
+    Guarda pesos, scaler, esquema de características, longitud de secuencia y rango de
+    datos de entrenamiento en un único directorio versionado por hash de contenido:
+    {directory}/{hash}/manifest.json + weights.npy (+ model.tflite). Los pesos se
+    guardan concatenados en un .npy float32 para poder abrirlos con mmap.
+    Devuelve el hash de la versión.
+    """
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".bundle-", dir=directory)
+    try:
+        arrays = [np.asarray(w, dtype=np.float32) for w in model.get_weights()]
+        flat = np.concatenate([a.reshape(-1) for a in arrays]) if arrays else np.empty(0, np.float32)
+        np.save(os.path.join(staging, WEIGHTS), flat)
+        layout, offset = [], 0
+        for a in arrays:
+            layout.append({"offset": offset, "shape": list(a.shape)})
+            offset += a.size
+        if tflite_content is not None:
+            with open(os.path.join(staging, TFLITE), "wb") as f:
+                f.write(tflite_content)
+
+        description = {
+            "format": BUNDLE_FORMAT,
+            "architecture": architecture,
+            "quantization": quantization,
+            "sequence_length": sequence_length,
+            "feature_schema": list(feature_schema),
+            "weights_layout": layout,
+            "scaler": _scaler_params(scaler),
+            "training_data": data_range,
+            "artifacts": [WEIGHTS] + ([TFLITE] if tflite_content is not None else []),
+        }
+        content_hash = _content_hash(staging, description)
+        manifest = dict(description, hash=content_hash, created_at=time.time())
+        with open(os.path.join(staging, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        version = content_hash[:16]
+        target = os.path.join(directory, version)
+        if os.path.exists(target):
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, target)
+        # Puntero atómico a la versión vigente
+        pointer = os.path.join(directory, LATEST + ".tmp")
+        with open(pointer, "w") as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(directory, LATEST))
+        return version
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+class ModelBundle:
+    """Bundle cargado: manifiesto, scaler reconstruido y pesos mapeados en memoria."""
+
+    def __init__(self, path, manifest, weights):
+        self.path = path
+        self.manifest = manifest
+        self.weights = weights
+
+    @property
+    def version(self):
+        return os.path.basename(self.path)
+
+    @property
+    def created_at(self):
+        return self.manifest["created_at"]
+
+    @property
+    def scaler(self):
+        return _restore_scaler(self.manifest["scaler"])
+
+    @property
+    def tflite_path(self):
+        # Solo se sirve el TFLite que forma parte del hash del bundle
+        return os.path.join(self.path, TFLITE) if TFLITE in self.manifest["artifacts"] else None
+
+    def weight_arrays(self):
+        """Vistas (sin copia) de cada tensor de pesos sobre el archivo mapeado."""
+        return [self.weights[l["offset"]:l["offset"] + int(np.prod(l["shape"], dtype=np.int64))].reshape(l["shape"])
+                for l in self.manifest["weights_layout"]]
+
+    def apply_weights(self, model):
+        """
+        Copia los pesos a las variables de Keras. El mmap solo evita leer el archivo
+        completo al abrirlo: set_weights materializa una copia propia del modelo. Se usa
+        para entrenar (maestro de la destilación) y para bundles sin TFLite; al servir,
+        MLModel usa el TFLite, que el intérprete lee del archivo mapeado.
+        """
+        model.set_weights(self.weight_arrays())
+        return model
+
+def load_bundle(directory, version=None, expected_schema=None, expected_sequence_length=None, verify=True):
+    """Carga y valida un bundle (por defecto la versión LATEST). Lanza BundleError si no es válido."""
+    if version is None:
+        pointer = os.path.join(directory, LATEST)
+        if not os.path.exists(pointer):
+            raise BundleError(f"No hay bundle en {directory}")
+        with open(pointer) as f:
+            version = f.read().strip()
+    path = os.path.join(directory, version)
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"Manifiesto ilegible en {path}: {e}")
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"Formato de bundle no soportado: {manifest.get('format')}")
+    if verify:
+        description = {k: v for k, v in manifest.items() if k not in ("hash", "created_at")}
+        try:
+            if _content_hash(path, description) != manifest["hash"]:
+                raise BundleError(f"Hash de contenido no coincide en {path}")
+        except OSError as e:
+            raise BundleError(f"Falta un artefacto del bundle en {path}: {e}")
+    if expected_schema is not None and list(expected_schema) != manifest["feature_schema"]:
+        raise BundleError("El esquema de características del bundle no coincide con el actual")
+    if expected_sequence_length is not None and expected_sequence_length != manifest["sequence_length"]:
+        raise BundleError("La longitud de secuencia del bundle no coincide con la actual")
+    weights = np.load(os.path.join(path, WEIGHTS), mmap_mode="r")
+    return ModelBundle(path, manifest, weights)
@@ -0,0 +1,161 @@
+import time
+import threading
+import logging
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import (LSTM, GRU, Conv1D, Dense, Dropout, Input,
+                                     GlobalAveragePooling1D)
+
+ARCHITECTURES = ("lstm", "gru", "conv", "student")
+QUANTIZATIONS = ("none", "float16", "int8")
+
+logger = logging.getLogger()
+
+def build_network(architecture, sequence_length, input_features):
+    """Crea (sin compilar) la red de la arquitectura pedida para entradas (secuencia, características)."""
+    layers = [Input(shape=(sequence_length, input_features))]
+    if architecture == "lstm":
+        # Arquitectura original de MLModel
+        layers += [LSTM(100, return_sequences=True), LSTM(100), Dense(50, activation='relu'), Dropout(0.2)]
+    elif architecture == "gru":
+        layers += [GRU(32), Dense(16, activation='relu'), Dropout(0.1)]
+    elif architecture == "conv":
+        # Convolución temporal causal: sin estado recurrente, muy rápida en CPU
+        layers += [Conv1D(32, 3, padding='causal', activation='relu'),
+                   Conv1D(32, 3, padding='causal', dilation_rate=2, activation='relu'),
+                   GlobalAveragePooling1D(), Dense(16, activation='relu')]
+    elif architecture == "student":
+        # Alumno mínimo que se entrena con las salidas del LSTM (destilación)
+        layers += [Conv1D(16, 3, padding='causal', activation='relu'), GlobalAveragePooling1D(),
+                   Dense(8, activation='relu')]
+    else:
+        raise ValueError(f"Arquitectura no soportada: {architecture}. Opciones: {ARCHITECTURES}")
+    layers.append(Dense(1, activation='sigmoid'))
+    return Sequential(layers)
+
+def distill(teacher, student, X, y=None, alpha=0.7, epochs=20, batch_size=64):
+    """
+    Entrena al alumno con una mezcla de las probabilidades del maestro (alpha) y
+    las etiquetas reales (1 - alpha). Devuelve el alumno entrenado.
+    """
+    soft = teacher(X, training=False).numpy().reshape(-1)
+    target = soft if y is None else alpha * soft + (1 - alpha) * np.asarray(y, dtype=np.float32)
+    student.fit(X, target, epochs=epochs, batch_size=batch_size, validation_split=0.1, verbose=0)
+    return student
+
+def quantize(model, mode, representative=None):
+    """
+    Convierte el modelo Keras a TFLite: 'none' en float32 sin optimizar (mismos pesos),
+    'float16' o 'int8' con cuantización post-entrenamiento.
+    """
+    if mode not in QUANTIZATIONS:
+        raise ValueError(f"Cuantización no soportada: {mode}")
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    # Las capas recurrentes pueden necesitar operaciones de TF fuera del set nativo
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    if mode == "none":
+        return converter.convert()
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif representative is not None:
+        samples = np.asarray(representative, dtype=np.float32)[:200]
+
+        def representative_dataset():
+            for sample in samples:
+                yield [sample[np.newaxis, ...]]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+                                               tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    return converter.convert()
+
+class TFLiteModel:
+    """Envoltorio del intérprete TFLite con la misma salida que model.predict (N, 1)."""
+
+    def __init__(self, content=None, path=None, num_threads=1):
+        self.interpreter = tf.lite.Interpreter(model_content=content, model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.size = len(content) if content is not None else None
+        # El intérprete no admite llamadas concurrentes (varios ciclos pueden compartir el modelo)
+        self._lock = threading.Lock()
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty((len(X), 1), dtype=np.float32)
+        with self._lock:
+            for i, sample in enumerate(X):
+                self.interpreter.set_tensor(self.input['index'], sample[np.newaxis, ...])
+                self.interpreter.invoke()
+                out[i] = self.interpreter.get_tensor(self.output['index']).reshape(-1)[:1]
+        return out
+
+def _measure(predict_fn, X, y, latency_samples=200):
+    probs = np.asarray(predict_fn(X)).reshape(-1)
+    accuracy = float(np.mean((probs > 0.5).astype(int) == y)) if len(y) else float('nan')
+    samples = X[-latency_samples:]
+    start = time.perf_counter()
+    for sample in samples:
+        predict_fn(sample[np.newaxis, ...])
+    latency_ms = (time.perf_counter() - start) / max(1, len(samples)) * 1000
+    return accuracy, latency_ms
+
+def compare_variants(ml_model, data, architectures=ARCHITECTURES, quantizations=QUANTIZATIONS,
+                     epochs=10, holdout=0.2):
+    """
+    Entrena cada arquitectura sobre los datos guardados y mide precisión en el tramo
+    final (cronológico), latencia por predicción individual y tamaño del modelo,
+    para cada cuantización. Devuelve una lista de diccionarios, uno por variante.
+    """
+    X, y = ml_model.prepare_training_data(data)
+    if X is None:
+        return []
+    split = int(len(X) * (1 - holdout))
+    X_train, y_train, X_test, y_test = X[:split], y[:split], X[split:], y[split:]
+    report = []
+    teacher = None
+    for architecture in architectures:
+        model = build_network(architecture, ml_model.sequence_length, X.shape[2])
+        model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=0.001), loss='binary_crossentropy',
+                      metrics=['accuracy'])
+        if architecture == "student":
+            if teacher is None:
+                teacher = build_network("lstm", ml_model.sequence_length, X.shape[2])
+                teacher.compile(optimizer='adam', loss='binary_crossentropy')
+                teacher.fit(X_train, y_train, epochs=epochs, batch_size=32, verbose=0)
+            distill(teacher, model, X_train, y_train, epochs=epochs)
+        else:
+            model.fit(X_train, y_train, epochs=epochs, batch_size=32, validation_split=0.1, verbose=0)
+            if architecture == "lstm":
+                teacher = model
+        for quantization in quantizations:
+            try:
+                # Todas las variantes se miden con el intérprete TFLite, como las sirve MLModel
+                runner = TFLiteModel(quantize(model, quantization, representative=X_train))
+                predict_fn = runner.predict
+                size = runner.size
+                accuracy, latency_ms = _measure(predict_fn, X_test, y_test)
+            except Exception as e:
+                logger.error(f"❌ Variante {architecture}/{quantization} falló: {e}")
+                continue
+            report.append({"architecture": architecture, "quantization": quantization,
+                           "params": model.count_params(), "size_bytes": size,
+                           "accuracy": accuracy, "latency_ms": latency_ms})
+            logger.info(f"📏 {architecture}/{quantization}: precisión {accuracy:.3f}, "
+                        f"latencia {latency_ms:.2f} ms, tamaño {size / 1024:.1f} KB")
+    return report
+
+if __name__ == "__main__":
+    import pandas as pd
+    from config.config import Config
+    from analysis.ml_model import MLModel
+
+    config = Config()
+    history = pd.read_csv(config.csv_path)
+    if 'timestamp' not in history.columns and 'from' in history.columns:
+        history.rename(columns={'from': 'timestamp'}, inplace=True)
+    for row in compare_variants(MLModel(config), history):
+        print(row)
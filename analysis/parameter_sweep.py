@@ -0,0 +1,279 @@
+import sys
+import json
+import time
+import argparse
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from strategies.strategy_signals import DEFAULT_STRATEGIES, enabled_strategies, evaluate_strategy
+from analysis.strategy_analyzer import DEFAULT_DECISION_PARAMS
+
+logger = logging.getLogger()
+
+DIRECTION_CODES = {"call": 1, "put": -1}
+PARAM_KEYS = ("min_confidence", "extra_confidence_factor", "min_analysis_period", "ml_boost")
+
+# Grilla por defecto: 3^S pesos x umbrales x factor temporal x calibración x refuerzo ML
+DEFAULT_GRID = {
+    "weight": [0.5, 1.0, 1.5],
+    "min_confidence": [0.6, 0.8, 1.0, 1.2, 1.4, 1.6],
+    "extra_confidence_factor": [0.0, 0.0005, 0.001, 0.002],
+    "min_analysis_period": [0, 300, 600],
+    "ml_boost": [0.0, 0.1, 0.2],
+}
+
+def _evaluate_range(data, names, window, news, ml_model, lo, hi, directions, confidences, ml):
+    for i in range(lo, hi):
+        recent = data.iloc[max(0, i - window + 1):i + 1]
+        for s, name in enumerate(names):
+            signal = evaluate_strategy(name, recent, news)
+            directions[s, i] = DIRECTION_CODES.get(signal.signal, 0)
+            confidences[s, i] = signal.confidence
+        if ml_model is not None:
+            ml[i] = DIRECTION_CODES.get(ml_model.predict(recent), 0)
+
+def precompute_signals(data, strategies=None, window=200, news=None, ml_model=None, workers=4, chunk=500):
+    """
+    Evalúa una sola vez cada estrategia en cada vela del histórico (con una ventana
+    móvil de `window` velas, como en el ciclo en vivo). Devuelve un dict con
+    directions (S x n, 1=call, -1=put, 0=otra), confidences (S x n), ml (n) y
+    valid (n), listo para barrer parámetros sin volver a calcular indicadores.
+    Los tramos se reparten entre hilos (TA-Lib y TensorFlow liberan el GIL).
+    """
+    names = list(strategies or DEFAULT_STRATEGIES)
+    n = len(data)
+    directions = np.zeros((len(names), n), dtype=np.int8)
+    confidences = np.zeros((len(names), n), dtype=np.float64)
+    ml = np.zeros(n, dtype=np.int8)
+    start = min(window, n)
+    ranges = [(lo, min(lo + chunk, n)) for lo in range(start, n, chunk)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda r: _evaluate_range(data, names, window, news, ml_model, r[0], r[1],
+                                                directions, confidences, ml), ranges))
+    valid = np.zeros(n, dtype=bool)
+    valid[start:] = True
+    return {"names": names, "directions": directions, "confidences": confidences, "ml": ml, "valid": valid}
+
+def expand_grid(names, grid=None):
+    """Producto cartesiano de la grilla como arreglos: pesos (C x S) y un vector por parámetro."""
+    grid = dict(DEFAULT_GRID, **(grid or {}))
+    weight_values = grid["weight"]
+    combos = list(itertools.product(itertools.product(weight_values, repeat=len(names)),
+                                    grid["min_confidence"], grid["extra_confidence_factor"],
+                                    grid["min_analysis_period"], grid["ml_boost"]))
+    return {
+        "weights": np.array([c[0] for c in combos], dtype=np.float64).reshape(len(combos), len(names)),
+        "min_confidence": np.array([c[1] for c in combos], dtype=np.float64),
+        "extra_confidence_factor": np.array([c[2] for c in combos], dtype=np.float64),
+        "min_analysis_period": np.array([c[3] for c in combos], dtype=np.float64),
+        "ml_boost": np.array([c[4] for c in combos], dtype=np.float64),
+    }
+
+def _simulate_chunk(pre, outcome, params, candle_size, cooldown_bars, payout):
+    """
+    Recorre las velas una vez y evalúa todas las combinaciones del tramo a la vez
+    (vectores de tamaño C). Replica el ciclo en vivo: consolidación ponderada por
+    dirección, refuerzo ML, confianza extra por tiempo desde la última operación,
+    calibración tras arrancar u operar y pausa mientras dura la operación.
+    """
+    directions, confidences = pre["directions"], pre["confidences"]
+    weights = params["weights"]
+    # Puntaje por dirección para cada (vela, combinación): (n x S) @ (S x C)
+    # Misma regla que consolidate_signals: gana el mayor puntaje entre las direcciones con
+    # alguna señal y, en empate, la que apareció primero (orden de las estrategias)
+    scores, firsts = {}, {}
+    for code in (1, -1, 0):
+        mask = directions == code
+        present = mask.any(axis=0)
+        scores[code] = np.where(present[:, None], (confidences * mask).T @ weights.T, -np.inf)
+        firsts[code] = np.where(present, mask.argmax(axis=0), len(directions))[:, None]
+
+    def beats(a, b):
+        return (scores[a] > scores[b]) | ((scores[a] == scores[b]) & (firsts[a] < firsts[b]))
+
+    chosen = np.where(beats(1, -1) & beats(1, 0), 1, np.where(beats(-1, 1) & beats(-1, 0), -1, 0)).astype(np.int8)
+    base = np.where(chosen == 1, scores[1], np.where(chosen == -1, scores[-1], 0.0))
+    base += params["ml_boost"] * ((pre["ml"][:, None] == chosen) & (chosen != 0))
+
+    combos = len(params["min_confidence"])
+    valid_idx = np.flatnonzero(pre["valid"])
+    first = valid_idx[0] if len(valid_idx) else len(outcome)
+    cycle_start = np.full(combos, first * candle_size, dtype=np.float64)
+    next_allowed = np.full(combos, first, dtype=np.int64)
+    trades = np.zeros(combos, dtype=np.int64)
+    wins = np.zeros(combos, dtype=np.int64)
+    equity = np.zeros(combos)
+    peak = np.zeros(combos)
+    drawdown = np.zeros(combos)
+    period = params["min_analysis_period"]
+    for i in valid_idx:
+        if outcome[i] == -2:
+            continue
+        elapsed = i * candle_size - cycle_start
+        effective = base[i] + (elapsed - period) * params["extra_confidence_factor"]
+        trade = ((i >= next_allowed) & (elapsed >= period) & (chosen[i] != 0)
+                 & (effective >= params["min_confidence"]))
+        if not trade.any():
+            continue
+        won = trade & (chosen[i] == outcome[i])
+        lost = trade & (chosen[i] == -outcome[i])
+        trades += trade
+        wins += won
+        equity += won * payout - lost
+        np.maximum(peak, equity, out=peak)
+        np.maximum(drawdown, peak - equity, out=drawdown)
+        # Tras operar, el ciclo en vivo espera la expiración y reinicia la calibración
+        next_allowed = np.where(trade, i + cooldown_bars, next_allowed)
+        cycle_start = np.where(trade, (i + cooldown_bars) * candle_size, cycle_start)
+    return trades, wins, equity, drawdown
+
+def evaluate(pre, data, params, candle_size=60, trade_duration=60, payout=0.85,
+             chunk_size=1024, workers=1, min_trades=20, rows=None):
+    """
+    Simula cada combinación de `params` (mismo formato que expand_grid) contra los
+    resultados reales del histórico y devuelve una fila por combinación, en orden.
+    rows=(desde, hasta) limita las operaciones a ese tramo de velas; las que vencerían
+    fuera del tramo se descartan para no mirar resultados de otro tramo.
+    workers > 1 reparte los tramos de combinaciones entre procesos.
+    """
+    close = data["close"].to_numpy(dtype=np.float64)
+    horizon = max(1, trade_duration // candle_size)
+    # Resultado de una operación abierta al cierre de cada vela: 1 sube, -1 baja, 0 empate, -2 desconocido
+    outcome = np.full(len(close), -2, dtype=np.int8)
+    outcome[:-horizon] = np.sign(close[horizon:] - close[:-horizon]).astype(np.int8)
+    cooldown_bars = int(np.ceil((trade_duration + 5) / candle_size))
+    if rows is not None:
+        lo, hi = rows
+        valid = np.zeros_like(pre["valid"])
+        valid[lo:max(lo, hi - horizon)] = pre["valid"][lo:max(lo, hi - horizon)]
+        pre = dict(pre, valid=valid)
+
+    combos = len(params["min_confidence"])
+    chunks = [{key: values[lo:lo + chunk_size] for key, values in params.items()}
+              for lo in range(0, combos, chunk_size)]
+    args = [(pre, outcome, chunk, candle_size, cooldown_bars, payout) for chunk in chunks]
+    started = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        results = [_simulate_chunk(*a) for a in args]
+    trades, wins, equity, drawdown = (np.concatenate(parts) for parts in zip(*results))
+    logger.info(f"🔁 Barrido de {combos} combinaciones en {time.perf_counter() - started:.2f} seg")
+
+    table = pd.DataFrame({f"weight_{name}": params["weights"][:, s] for s, name in enumerate(pre["names"])})
+    for key in PARAM_KEYS:
+        table[key] = params[key]
+    table["trades"] = trades
+    table["win_rate"] = np.divide(wins, trades, out=np.zeros(combos), where=trades > 0)
+    table["pnl"] = equity
+    table["expectancy"] = np.divide(equity, trades, out=np.zeros(combos), where=trades > 0)
+    table["max_drawdown"] = drawdown
+    table["enough_trades"] = trades >= min_trades
+    return table
+
+def sweep(pre, data, grid=None, **kwargs):
+    """
+    Evalúa todas las combinaciones de la grilla (ver evaluate) y devuelve un DataFrame
+    ordenado (mejor primero) por PnL en unidades de monto apostado. Las combinaciones
+    con menos de min_trades quedan al final.
+    """
+    table = evaluate(pre, data, expand_grid(pre["names"], grid), **kwargs)
+    return table.sort_values(["enough_trades", "pnl", "max_drawdown"], ascending=[False, False, True]).reset_index(drop=True)
+
+def table_params(table, names):
+    """Filas del ranking -> arreglos de parámetros (formato de expand_grid)."""
+    params = {"weights": table[[f"weight_{name}" for name in names]].to_numpy(dtype=np.float64)}
+    params.update({key: table[key].to_numpy(dtype=np.float64) for key in PARAM_KEYS})
+    return params
+
+def validate(pre, data, candidates, rows, **kwargs):
+    """
+    Vuelve a simular las combinaciones candidatas sobre otro tramo (fuera de muestra)
+    y agrega sus métricas como columnas holdout_*, conservando el orden del ranking.
+    """
+    result = evaluate(pre, data, table_params(candidates, pre["names"]), rows=rows, **kwargs)
+    validated = candidates.reset_index(drop=True)
+    for column in ("trades", "win_rate", "pnl", "expectancy", "max_drawdown", "enough_trades"):
+        validated[f"holdout_{column}"] = result[column].to_numpy()
+    return validated
+
+def best_params(table, names):
+    """Primera fila del ranking en el formato que carga load_decision_params."""
+    row = table.iloc[0]
+    params = dict(DEFAULT_DECISION_PARAMS)
+    params.update({
+        "weights": {name: float(row[f"weight_{name}"]) for name in names},
+        "min_confidence": float(row["min_confidence"]),
+        "extra_confidence_factor": float(row["extra_confidence_factor"]),
+        "min_analysis_period": int(row["min_analysis_period"]),
+        "ml_boost": float(row["ml_boost"]),
+    })
+    return params
+
+if __name__ == "__main__":
+    from config.config import Config
+    from utils.logger import setup_logger
+
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de la regla de decisión sobre el histórico")
+    parser.add_argument("--source", help="CSV o .crpa con el histórico (por defecto el CSV configurado)")
+    parser.add_argument("--window", type=int, default=200, help="Velas visibles por ciclo para las estrategias")
+    parser.add_argument("--ml", action="store_true", help="Incluir la validación ML (más lento)")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para el barrido")
+    parser.add_argument("--payout", type=float, default=0.85)
+    parser.add_argument("--min-trades", type=int, default=20)
+    parser.add_argument("--holdout", type=float, default=0.3, help="Fracción final del histórico reservada para validar")
+    parser.add_argument("--candidates", type=int, default=20, help="Mejores combinaciones a validar fuera de muestra")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", help="CSV con el ranking completo")
+    args = parser.parse_args()
+
+    setup_logger()
+    config = Config()
+    source = args.source or config.csv_path
+    if source.endswith(".crpa"):
+        from data.archive import DeltaArchive
+        history = DeltaArchive(source).read_frame()
+    else:
+        history = pd.read_csv(source)
+    if 'timestamp' not in history.columns and 'from' in history.columns:
+        history.rename(columns={'from': 'timestamp'}, inplace=True)
+    history = history.drop_duplicates(subset=['timestamp']).sort_values('timestamp').reset_index(drop=True)
+
+    ml_model = None
+    if args.ml:
+        from analysis.ml_model import MLModel
+        ml_model = MLModel(config)
+        ml_model.load()
+    started = time.perf_counter()
+    pre = precompute_signals(history, enabled_strategies(config), window=args.window, ml_model=ml_model)
+    logger.info(f"📐 Señales precalculadas para {len(history)} velas en {time.perf_counter() - started:.2f} seg")
+    grid = None if args.ml else {"ml_boost": [0.0]}
+    options = dict(candle_size=config.candle_size, trade_duration=config.trade_duration,
+                   payout=args.payout, workers=args.workers)
+    # El ranking se arma solo con el tramo inicial; el final queda para validar
+    split = int(len(history) * (1 - args.holdout))
+    table = sweep(pre, history, grid, min_trades=args.min_trades, rows=(0, split), **options)
+    print(table.head(args.top).to_string())
+    table.to_csv(args.output or config.decision_params_path.replace(".json", "_sweep.csv"), index=False)
+    if not table["enough_trades"].any():
+        logger.error(f"❌ Ninguna combinación alcanzó {args.min_trades} operaciones; no se actualizan los parámetros")
+        sys.exit(1)
+
+    candidates = table[table["enough_trades"]].head(args.candidates)
+    holdout_trades = max(1, int(args.min_trades * args.holdout / max(1e-9, 1 - args.holdout)))
+    validated = validate(pre, history, candidates, (split, len(history)), min_trades=holdout_trades, **options)
+    print(validated[[c for c in validated.columns if c.startswith("holdout_") or c == "pnl"]].to_string())
+    # Se promueve la mejor del ranking que también gana fuera de muestra (no la mejor del holdout)
+    passed = validated[validated["holdout_enough_trades"] & (validated["holdout_pnl"] > 0)]
+    if passed.empty:
+        logger.error("❌ Ninguna combinación candidata se sostiene fuera de muestra; no se actualizan los parámetros")
+        sys.exit(1)
+    # Sin --ml el barrido y la validación usan ml_boost 0.0, y eso es lo que se guarda:
+    # un refuerzo que no se validó cambiaría las decisiones en vivo
+    params = best_params(passed, pre["names"])
+    with open(config.decision_params_path, "w") as f:
+        json.dump(params, f, indent=2)
+    logger.info(f"💾 Parámetros de decisión guardados en {config.decision_params_path}")
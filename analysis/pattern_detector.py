@@ -12,8 +12,9 @@ class PatternDetector:
         latest = data.iloc[-1]
         support = data["min"].rolling(50).min().iloc[-1]
         resistance = data["max"].rolling(50).max().iloc[-1]
-        data["sma10"] = talib.SMA(data["close"], timeperiod=10)
-        trend = "up" if latest["close"] > data["sma10"].iloc[-1] else "down"
+        # Series locales: no se agregan columnas al DataFrame del llamador
+        sma10 = talib.SMA(data["close"], timeperiod=10)
+        trend = "up" if latest["close"] > sma10.iloc[-1] else "down"
         movement = latest["close"] - latest["open"]
         volume_spike = latest["volume"] > talib.SMA(data["volume"], 20).iloc[-1] * 1.5
 
@@ -42,14 +43,13 @@ class PatternDetector:
         """RSI y MACD ajustados (inspirado en Nadex)."""
         if len(data) < 35:
             return {"strategy": "momentum", "signal": None, "confidence": 0.0}
-        data["rsi"] = talib.RSI(data["close"], timeperiod=5)
+        rsi = talib.RSI(data["close"], timeperiod=5).iloc[-1]
         macd, macd_signal, _ = talib.MACD(data["close"], fastperiod=12, slowperiod=26, signalperiod=9)
-        data["macd_diff"] = macd - macd_signal
-        latest = data.iloc[-1]
+        macd_diff = (macd - macd_signal).iloc[-1]
 
-        if latest["rsi"] < 35 and latest["macd_diff"] > 0:
+        if rsi < 35 and macd_diff > 0:
             return {"strategy": "momentum", "signal": "call", "confidence": 0.7}
-        elif latest["rsi"] > 65 and latest["macd_diff"] < 0:
+        elif rsi > 65 and macd_diff < 0:
             return {"strategy": "momentum", "signal": "put", "confidence": 0.7}
         return {"strategy": "momentum", "signal": None, "confidence": 0.0}
 
@@ -0,0 +1,168 @@
+import logging
+import numpy as np
+import talib
+
+# Ventana previa que necesitan los CDL de TA-Lib (promedios de cuerpo/sombra de 10 velas
+# más patrones de hasta 5 velas); se usa al evaluar solo las velas nuevas.
+DEFAULT_LOOKBACK = 32
+DEFAULT_MAX_CACHE = 5000
+
+def _pinocchio(o, h, l, c):
+    # Sombra superior mayor al doble del cuerpo: señal bajista
+    return np.where((h - np.maximum(o, c)) > 2 * np.abs(o - c), -100, 0)
+
+def _hammer_iq(o, h, l, c):
+    return np.where((c > o) & (l < o * 0.999) & (h - c < c - o), 100, 0)
+
+def _shooting_star_iq(o, h, l, c):
+    return np.where((c < o) & (h > o * 1.001) & (c - l < o - c), -100, 0)
+
+# Reglas propias, vectorizadas con la misma firma que las funciones CDL de TA-Lib
+CUSTOM_PATTERNS = {
+    "PINOCCHIO": _pinocchio,
+    "HAMMER_IQ": _hammer_iq,
+    "SHOOTING_STAR_IQ": _shooting_star_iq,
+}
+
+class PatternMatrix:
+    """
+    Resultado compacto del escaneo, alineado fila a fila con la ventana recibida.
+    - scores: matriz int8 (velas x patrones); +1/+2 alcista, -1/-2 bajista, 0 sin patrón.
+    - bullish / bearish: máscaras de bits uint64 por vela (bit i = patrón names[i]).
+    """
+    __slots__ = ('names', 'timestamps', 'scores')
+
+    def __init__(self, names, timestamps, scores):
+        self.names = names
+        self.timestamps = timestamps
+        self.scores = scores
+
+    @property
+    def bullish(self):
+        return _bitmask(self.scores > 0)
+
+    @property
+    def bearish(self):
+        return _bitmask(self.scores < 0)
+
+    @property
+    def score(self):
+        """Puntaje neto por vela (suma de todos los patrones)."""
+        return self.scores.sum(axis=1, dtype=np.int32)
+
+    def column(self, name):
+        return self.scores[:, self.names.index(name)]
+
+    def latest(self):
+        """Diccionario patrón -> puntaje de la última vela (solo los activos)."""
+        if not len(self.scores):
+            return {}
+        row = self.scores[-1]
+        return {name: int(v) for name, v in zip(self.names, row) if v}
+
+    def features(self):
+        """Columnas numéricas para el set de características del modelo ML."""
+        return np.column_stack([
+            self.score.astype(np.float64),
+            (self.scores > 0).sum(axis=1).astype(np.float64),
+            (self.scores < 0).sum(axis=1).astype(np.float64),
+        ])
+
+def _bitmask(flags):
+    weights = np.left_shift(np.uint64(1), np.arange(flags.shape[1], dtype=np.uint64))
+    return (flags.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+# Número de columnas que aporta PatternMatrix.features()
+PATTERN_FEATURES = 3
+
+class PatternScanner:
+    def __init__(self, patterns, lookback=DEFAULT_LOOKBACK, max_cache=DEFAULT_MAX_CACHE):
+        self.logger = logging.getLogger()
+        self.functions = {}
+        for name in patterns:
+            func = CUSTOM_PATTERNS.get(name) or getattr(talib, name, None)
+            if func is None:
+                self.logger.warning(f"⚠️ Patrón desconocido ignorado: {name}")
+                continue
+            self.functions[name] = func
+        if len(self.functions) > 64:
+            raise ValueError("Se admiten como máximo 64 patrones por máscara de bits")
+        self.names = list(self.functions)
+        self.lookback = lookback
+        self.max_cache = max_cache
+        # Caché de velas cerradas: (timestamps ordenados, fila de puntajes). Se reemplaza
+        # como una sola tupla, así un escaneo concurrente con clear() nunca ve mitades distintas
+        self._cache = self._empty_cache()
+
+    def _empty_cache(self):
+        return np.empty(0, dtype=np.int64), np.empty((0, len(self.names)), dtype=np.int8)
+
+    @staticmethod
+    def _ohlc(data):
+        high = 'max' if 'max' in data.columns else 'high'
+        low = 'min' if 'min' in data.columns else 'low'
+        return (data['open'].to_numpy(dtype=np.float64), data[high].to_numpy(dtype=np.float64),
+                data[low].to_numpy(dtype=np.float64), data['close'].to_numpy(dtype=np.float64))
+
+    def _evaluate(self, o, h, l, c):
+        scores = np.zeros((len(c), len(self.names)), dtype=np.int8)
+        for i, name in enumerate(self.names):
+            raw = np.asarray(self.functions[name](o, h, l, c))
+            scores[:, i] = np.sign(raw) * np.minimum(np.abs(raw) // 100, 2)
+        return scores
+
+    def scan(self, data, last_bar_closed=False):
+        """
+        Evalúa todos los patrones sobre la ventana completa. Las velas cerradas ya
+        evaluadas se toman de la caché y solo se calculan las nuevas (más la vela en
+        curso, salvo que last_bar_closed=True).
+        """
+        if data is None or data.empty:
+            return PatternMatrix(self.names, np.empty(0, dtype=np.int64),
+                                 np.empty((0, len(self.names)), dtype=np.int8))
+        o, h, l, c = self._ohlc(data)
+        n = len(c)
+        if 'timestamp' not in data.columns:
+            # Sin clave temporal no hay caché posible: escaneo completo
+            return PatternMatrix(self.names, np.arange(n, dtype=np.int64), self._evaluate(o, h, l, c))
+
+        ts = data['timestamp'].to_numpy(dtype=np.int64)
+        scores = np.zeros((n, len(self.names)), dtype=np.int8)
+        cache_ts, cache_scores = self._cache
+        idx = np.searchsorted(cache_ts, ts)
+        hit = (idx < len(cache_ts)) & (cache_ts[np.minimum(idx, len(cache_ts) - 1)] == ts) \
+            if len(cache_ts) else np.zeros(n, dtype=bool)
+        if not last_bar_closed:
+            hit[-1] = False
+        scores[hit] = cache_scores[idx[hit]]
+
+        misses = np.flatnonzero(~hit)
+        if len(misses):
+            first = misses[0]
+            if np.all(misses == np.arange(first, n)):
+                # Caso habitual: solo faltan las velas finales
+                start = max(0, first - self.lookback)
+                tail = self._evaluate(o[start:], h[start:], l[start:], c[start:])
+                scores[first:] = tail[first - start:]
+            else:
+                scores = self._evaluate(o, h, l, c)
+            self._store(ts, scores, misses if last_bar_closed else misses[misses < n - 1])
+        return PatternMatrix(self.names, ts, scores)
+
+    def _store(self, ts, scores, rows):
+        if not len(rows):
+            return
+        cache_ts, cache_scores = self._cache
+        new_ts = np.concatenate([cache_ts, ts[rows]])
+        new_scores = np.concatenate([cache_scores, scores[rows]])
+        order = np.argsort(new_ts, kind='stable')
+        new_ts, new_scores = new_ts[order], new_scores[order]
+        keep = np.concatenate([new_ts[1:] != new_ts[:-1], [True]])
+        self._cache = (new_ts[keep][-self.max_cache:], new_scores[keep][-self.max_cache:])
+
+    def clear(self):
+        self._cache = self._empty_cache()
+
+    def memory_bytes(self):
+        cache_ts, cache_scores = self._cache
+        return cache_ts.nbytes + cache_scores.nbytes
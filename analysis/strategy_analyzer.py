@@ -1,9 +1,34 @@
+import os
+import json
 import logging
+from strategies.signal import Signal
+
+# Regla de decisión del ciclo principal; analysis/parameter_sweep.py genera un JSON que la reemplaza
+DEFAULT_DECISION_PARAMS = {
+    "weights": {},                     # Peso por estrategia (1.0 si no figura)
+    "min_confidence": 1.0,             # Umbral mínimo para emitir una orden
+    "extra_confidence_factor": 0.001,  # Incremento de confianza por segundo extra
+    "min_analysis_period": 300,        # Segundos de análisis sin operar tras arrancar u operar
+    "ml_boost": 0.1,                   # Refuerzo si la validación ML coincide
+}
+
+def load_decision_params(path):
+    """Parámetros de decisión desde el JSON del barrido; los que falten toman el valor por defecto."""
+    params = dict(DEFAULT_DECISION_PARAMS)
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                params.update(json.load(f))
+            logging.getLogger().info(f"🎛️ Parámetros de decisión cargados desde {path}")
+        except (OSError, ValueError) as e:
+            logging.getLogger().warning(f"⚠️ Parámetros de decisión ilegibles en {path}, se usan los por defecto: {e}")
+    return params
 
 class StrategyAnalyzer:
-    def __init__(self, ml_model):
+    def __init__(self, ml_model, weights=None):
         self.logger = logging.getLogger()
         self.ml_model = ml_model
+        self.weights = weights or {}
 
     def consolidate_signals(self, signals, data_context):
         if not signals:
@@ -13,16 +38,18 @@ class StrategyAnalyzer:
         direction_confidence = {}
         strategy_for_direction = {}
         for s in signals:
-            direction = s.get("signal")
-            conf = s.get("confidence", 0)
+            # Acepta Signal o dicts heredados (p. ej. PatternDetector)
+            s = Signal.coerce(s)
+            direction = s.signal
+            confidence = s.confidence * self.weights.get(s.strategy, 1.0)
             if direction in direction_confidence:
-                direction_confidence[direction] += conf
+                direction_confidence[direction] += confidence
             else:
-                direction_confidence[direction] = conf
-                strategy_for_direction[direction] = s.get("strategy", "unknown")
+                direction_confidence[direction] = confidence
+                strategy_for_direction[direction] = s.strategy or "unknown"
         
         chosen_direction = max(direction_confidence, key=direction_confidence.get)
         total_confidence = direction_confidence[chosen_direction]
         dominant_strategy = strategy_for_direction.get(chosen_direction, "unknown")
-        self.logger.info(f"Consolidación: dirección {chosen_direction}, confianza {total_confidence:.2f}, estrategia {dominant_strategy}")
+        self.logger.info("Consolidación: dirección %s, confianza %.2f, estrategia %s", chosen_direction, total_confidence, dominant_strategy)
         return {"direction": chosen_direction, "confidence": total_confidence, "strategy": dominant_strategy}
\ No newline at end of file
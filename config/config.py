@@ -24,11 +24,80 @@ class Config:
             self.market_open = time(7, 0)
             self.market_close = time(16, 0)
             
+        # Arquitectura del modelo ML: lstm (original), gru, conv o student (destilado del LSTM)
+        self.model_architecture = os.getenv("MODEL_ARCH", "lstm")
+        # Cuantización post-entrenamiento: none, float16 o int8 (inferencia con TFLite)
+        self.model_quantization = os.getenv("MODEL_QUANT", "none")
+        # Bundle del LSTM original, usado como maestro para la variante 'student'
+        self.teacher_bundle_dir = self.model_path.replace(".keras", "")
+        if self.model_architecture != "lstm":
+            self.model_path = self.model_path.replace(".keras", f".{self.model_architecture}.keras")
+        # Bundle versionado (pesos, scaler, esquema y rango de datos) del modelo servido
+        self.model_bundle_dir = self.model_path.replace(".keras", "") + (
+            f".{self.model_quantization}" if self.model_quantization != "none" else "")
+        # Diario de operaciones (SQLite) con todas las decisiones del ciclo principal
+        self.journal_path = os.getenv("TRADE_JOURNAL_PATH", f"{self.data_path}{self.data_assets}_journal.db")
+        # Historial comprimido de largo plazo (velas y, opcionalmente, ticks del stream)
+        self.archive_path = self.csv_path.replace(".csv", ".crpa")
+        self.archive_ticks = os.getenv("ARCHIVE_TICKS", "0") == "1"
+        self.tick_archive_path = self.csv_path.replace(".csv", "_ticks.crpa") if self.archive_ticks else None
+        # Etiquetas en archivo propio indexado por timestamp (las velas no se modifican)
+        self.labels_path = self.csv_path.replace(".csv", "_labels.csv")
+        # Regla de decisión ajustada por analysis/parameter_sweep.py (si existe el archivo)
+        self.decision_params_path = os.getenv("DECISION_PARAMS_PATH", self.csv_path.replace(".csv", "_decision.json"))
+        # Instantánea del estado de ejecución para arranques en caliente
+        self.snapshot_path = os.getenv("STATE_SNAPSHOT_PATH", self.csv_path.replace(".csv", "_state.json"))
+        self.snapshot_interval = float(os.getenv("STATE_SNAPSHOT_INTERVAL", "30"))
+        self.snapshot_max_age = float(os.getenv("STATE_SNAPSHOT_MAX_AGE", "600"))
         self.data_order = os.getenv("IQ_DATA_ORDER", f"{self.data_assets}-op")
         self.data_window_seconds = int(os.getenv("DATA_WINDOW_SECONDS", "61080"))
         self.threshold_call = 0.0005
         self.threshold_put = -0.0005
         self.risk_percentage = 0.05
+        # Límites de cartera del motor de riesgo (fracciones del capital)
+        self.max_open_trades = int(os.getenv("RISK_MAX_OPEN_TRADES", "3"))
+        self.max_exposure = float(os.getenv("RISK_MAX_EXPOSURE", "0.15"))
+        self.max_asset_exposure = float(os.getenv("RISK_MAX_ASSET_EXPOSURE", "0.10"))
+        self.daily_loss_limit = float(os.getenv("RISK_DAILY_LOSS_LIMIT", "0.10"))
+        self.min_stake = 1.0
+        self.balance_reconcile_interval = float(os.getenv("BALANCE_RECONCILE_INTERVAL", "60"))
+        self.candle_size = 60       # Tamaño de vela en segundos
+        self.trade_duration = 60    # Expiración de las operaciones en segundos
+        # Consultas del resultado tras la expiración antes de dejarlo a la conciliación
+        self.result_poll_attempts = 5
+        self.result_poll_interval = 2.0
+        self.label_horizons = [1, 2, 5]  # Horizontes de etiquetado en velas
+        # Patrones de velas a escanear: funciones CDL* de TA-Lib y reglas propias
+        self.candle_patterns = os.getenv(
+            "CANDLE_PATTERNS",
+            "CDLHAMMER,CDLSHOOTINGSTAR,CDLENGULFING,CDLHARAMI,CDLDOJI,CDLMORNINGSTAR,"
+            "CDLEVENINGSTAR,CDL3WHITESOLDIERS,CDL3BLACKCROWS,PINOCCHIO,HAMMER_IQ,SHOOTING_STAR_IQ"
+        ).split(",")
+        self.use_pattern_features = os.getenv("USE_PATTERN_FEATURES", "0") == "1"
+        # Estrategia de patrones de velas como voto adicional (apagada: vota el conjunto original)
+        self.use_candle_pattern_strategy = os.getenv("USE_CANDLE_PATTERN_STRATEGY", "0") == "1"
+        # Marcos temporales mayores (segundos) derivados de las velas de 1 minuto
+        self.timeframes = [int(tf) for tf in os.getenv("TIMEFRAMES", "300,900,3600").split(",") if tf]
+        self.use_mtf_features = os.getenv("USE_MTF_FEATURES", "0") == "1"
+        # Planificación del ciclo: 'close' (al cierre de vela) o 'tick' (con debounce)
+        self.schedule_mode = os.getenv("SCHEDULE_MODE", "close")
+        self.tick_debounce = float(os.getenv("TICK_DEBOUNCE", "0.5"))
+        self.bar_close_grace = 2.0  # Segundos de margen si el stream no avisa el cierre
+        # Presupuesto por ciclo para estrategias y validación ML en paralelo
+        self.cycle_budget = float(os.getenv("CYCLE_BUDGET", "2.0"))
+        self.cycle_workers = int(os.getenv("CYCLE_WORKERS", "4"))
+        # Presupuestos de memoria por componente (MB) y muestreo de RSS/tracemalloc
+        self.memory_budgets = {
+            "candle_buffer": float(os.getenv("MEM_BUDGET_CANDLES_MB", "8")) * 1024 * 1024,
+            "feature_cache": float(os.getenv("MEM_BUDGET_FEATURES_MB", "16")) * 1024 * 1024,
+            "model": float(os.getenv("MEM_BUDGET_MODEL_MB", "512")) * 1024 * 1024,  # Solo se verifica al arrancar
+        }
+        self.memory_sample_interval = float(os.getenv("MEM_SAMPLE_INTERVAL", "300"))
+        self.memory_trace = os.getenv("MEM_TRACEMALLOC", "0") == "1"
+        # Simulador local de la API (reproduce velas guardadas) para pruebas offline
+        self.simulate = os.getenv("IQ_SIMULATE", "0") == "1"
+        self.simulation_speed = float(os.getenv("IQ_SIMULATION_SPEED", "1"))
+        self.simulation_source = os.getenv("IQ_SIMULATION_SOURCE", self.csv_path)
 
 if __name__ == "__main__":
     config = Config()
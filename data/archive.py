@@ -0,0 +1,291 @@
+import os
+import json
+import zlib
+import struct
+import numpy as np
+import pandas as pd
+
+MAGIC = b"CRPSYARC"
+FOOTER_MAGIC = b"CRPSYIDX"
+VERSION = 1
+DEFAULT_BLOCK_SIZE = 4096
+
+# Esquemas: campo -> escala entera. La escala 1 con 'timestamp' guarda enteros exactos;
+# los precios se guardan como enteros escalados (1e6 cubre 5-6 decimales de forex/OTC).
+CANDLE_SCHEMA = [("timestamp", 1), ("open", 1_000_000), ("close", 1_000_000),
+                 ("min", 1_000_000), ("max", 1_000_000), ("volume", 100)]
+TICK_SCHEMA = [("timestamp", 1), ("price", 1_000_000), ("volume", 100)]
+
+_HEADER = struct.Struct("<8sHI")          # magic, versión, largo del JSON de esquema
+_FOOTER = struct.Struct("<QI8s")          # offset del índice, cantidad de bloques, magic
+_COLUMN = struct.Struct("<BqI")           # código de dtype, primer valor, largo comprimido
+_INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("rows", "<u4"),
+                         ("first_ts", "<i8"), ("last_ts", "<i8")])
+_DTYPES = [np.dtype("<u1"), np.dtype("<u2"), np.dtype("<u4"), np.dtype("<u8")]
+
+def _zigzag(values):
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+def _unzigzag(values):
+    values = values.astype(np.uint64)
+    return ((values >> np.uint64(1)).astype(np.int64)) ^ -((values & np.uint64(1)).astype(np.int64))
+
+def _encode_column(values, level):
+    """Enteros -> primer valor + deltas en zigzag con el dtype sin signo más chico posible, comprimidos."""
+    first = int(values[0]) if len(values) else 0
+    deltas = _zigzag(np.diff(values))
+    peak = int(deltas.max()) if len(deltas) else 0
+    code = next(i for i, dt in enumerate(_DTYPES) if peak <= np.iinfo(dt).max)
+    payload = zlib.compress(deltas.astype(_DTYPES[code]).tobytes(), level)
+    return _COLUMN.pack(code, first, len(payload)) + payload
+
+def _decode_column(buffer, pos, rows):
+    code, first, length = _COLUMN.unpack_from(buffer, pos)
+    pos += _COLUMN.size
+    deltas = np.frombuffer(zlib.decompress(buffer[pos:pos + length]), dtype=_DTYPES[code])
+    values = np.empty(rows, dtype=np.int64)
+    if rows:
+        values[0] = first
+        np.cumsum(_unzigzag(deltas), out=values[1:])
+        values[1:] += first
+    return values, pos + length
+
+class DeltaArchive:
+    """
+    Archivo comprimido por bloques para historiales largos (velas o ticks).
+    Cada bloque guarda por columna el primer valor y los deltas en zigzag como
+    enteros escalados, con zlib. Un índice al final del archivo (offset, filas y
+    rango de timestamps por bloque) permite saltar bloques y leer en streaming.
+    Los timestamps deben ser crecientes: al agregar se descartan filas ya cubiertas.
+    Las escrituras nunca pisan datos confirmados: los bloques nuevos, el índice y
+    por último el footer se agregan al final. Si el proceso muere a mitad de
+    camino, la lectura retrocede hasta el último footer válido (el estado previo).
+    El espacio muerto que dejan los bloques reescritos se recupera con compact().
+    """
+
+    def __init__(self, path, schema=CANDLE_SCHEMA, block_size=DEFAULT_BLOCK_SIZE, level=6):
+        self.path = path
+        self.block_size = block_size
+        self.level = level
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.schema = self._read_schema()
+        else:
+            self.schema = [(name, int(scale)) for name, scale in schema]
+        self.fields = [name for name, _ in self.schema]
+        self.dtype = np.dtype([(name, np.int64 if scale == 1 else np.float64) for name, scale in self.schema])
+
+    # --- Lectura ---
+
+    def _read_schema(self):
+        with open(self.path, "rb") as f:
+            magic, version, length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} no es un archivo de historial válido")
+            return [tuple(item) for item in json.loads(f.read(length))]
+
+    @staticmethod
+    def _valid_footer(f, footer_pos):
+        f.seek(footer_pos)
+        index_offset, count, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+        if magic == FOOTER_MAGIC and index_offset + count * _INDEX_DTYPE.itemsize == footer_pos:
+            return index_offset, count
+        return None
+
+    def _find_footer(self, f, size):
+        """
+        Footer válido más reciente: normalmente al final del archivo; tras una escritura
+        interrumpida, el anterior (se busca hacia atrás y se valida contra el índice).
+        """
+        if size >= _FOOTER.size:
+            found = self._valid_footer(f, size - _FOOTER.size)
+            if found:
+                return found + (size,)
+        magic_at = _FOOTER.size - len(FOOTER_MAGIC)
+        pos = size
+        while pos > _HEADER.size:
+            start = max(0, pos - 65536)
+            f.seek(start)
+            chunk = f.read(pos - start + len(FOOTER_MAGIC))
+            hit = chunk.rfind(FOOTER_MAGIC)
+            while hit >= 0:
+                footer_pos = start + hit - magic_at
+                if footer_pos >= 0:
+                    found = self._valid_footer(f, footer_pos)
+                    if found:
+                        return found + (footer_pos + _FOOTER.size,)
+                hit = chunk.rfind(FOOTER_MAGIC, 0, hit)
+            pos = start
+        return None
+
+    def _read_index(self):
+        """(índice, offset del índice, fin de los datos confirmados)."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return np.empty(0, dtype=_INDEX_DTYPE), None, 0
+        with open(self.path, "rb") as f:
+            found = self._find_footer(f, os.path.getsize(self.path))
+            if found is None:
+                # Ningún append llegó a confirmarse: el archivo no tiene datos válidos
+                return np.empty(0, dtype=_INDEX_DTYPE), None, 0
+            index_offset, count, end = found
+            f.seek(index_offset)
+            index = np.frombuffer(f.read(count * _INDEX_DTYPE.itemsize), dtype=_INDEX_DTYPE)
+        return index, index_offset, end
+
+    def index(self):
+        index, index_offset, _ = self._read_index()
+        return index, index_offset
+
+    def __len__(self):
+        return int(self.index()[0]["rows"].sum())
+
+    def _decode_block(self, buffer, rows):
+        out = np.empty(rows, dtype=self.dtype)
+        pos = 0
+        for name, scale in self.schema:
+            values, pos = _decode_column(buffer, pos, rows)
+            out[name] = values if scale == 1 else values / scale
+        return out
+
+    def iter_blocks(self, start=None, end=None):
+        """Genera un arreglo estructurado por bloque, leyendo solo los bloques del rango pedido."""
+        index, _ = self.index()
+        if not len(index):
+            return
+        ts_field = self.fields[0]
+        with open(self.path, "rb") as f:
+            for entry in index:
+                if (start is not None and entry["last_ts"] < start) or (end is not None and entry["first_ts"] > end):
+                    continue
+                f.seek(int(entry["offset"]))
+                block = self._decode_block(f.read(int(entry["length"])), int(entry["rows"]))
+                if start is not None or end is not None:
+                    ts = block[ts_field]
+                    mask = np.ones(len(block), dtype=bool)
+                    if start is not None:
+                        mask &= ts >= start
+                    if end is not None:
+                        mask &= ts <= end
+                    block = block[mask]
+                yield block
+
+    def read(self, start=None, end=None):
+        blocks = list(self.iter_blocks(start, end))
+        return np.concatenate(blocks) if blocks else np.empty(0, dtype=self.dtype)
+
+    def read_frame(self, start=None, end=None):
+        return pd.DataFrame(self.read(start, end))
+
+    # --- Escritura ---
+
+    def _to_array(self, rows):
+        if isinstance(rows, np.ndarray) and rows.dtype.names:
+            frame = pd.DataFrame({name: rows[name] for name in rows.dtype.names})
+        elif isinstance(rows, pd.DataFrame):
+            frame = rows
+        else:
+            frame = pd.DataFrame([r.to_dict() if hasattr(r, "to_dict") else r for r in rows])
+        if self.fields[0] not in frame.columns and "from" in frame.columns:
+            frame = frame.rename(columns={"from": self.fields[0]})
+        frame = frame.drop_duplicates(subset=[self.fields[0]], keep="last").sort_values(self.fields[0])
+        scaled = {}
+        for name, scale in self.schema:
+            column = frame[name].to_numpy(dtype=np.float64) if name in frame.columns else np.zeros(len(frame))
+            scaled[name] = np.rint(column * scale).astype(np.int64)
+        return scaled, len(frame)
+
+    def _encode_block(self, scaled, lo, hi):
+        return b"".join(_encode_column(scaled[name][lo:hi], self.level) for name, _ in self.schema)
+
+    def append(self, rows):
+        """Agrega filas al final (ordenadas por timestamp). Devuelve la cantidad escrita."""
+        scaled, count = self._to_array(rows)
+        index, _, end = self._read_index()
+        ts_field = self.fields[0]
+        if len(index) and count:
+            keep = scaled[ts_field] > index[-1]["last_ts"]
+            scaled = {name: values[keep] for name, values in scaled.items()}
+            count = int(keep.sum())
+        if not count:
+            return 0
+        written = count
+
+        if not len(index):
+            # Archivo nuevo (o sin ningún append confirmado): no hay nada que preservar
+            header = json.dumps(self.schema).encode()
+            with open(self.path, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, len(header)) + header)
+            end = _HEADER.size + len(header)
+            entries = []
+        else:
+            entries = list(index)
+            last = index[-1]
+            if last["rows"] < self.block_size:
+                # El último bloque está incompleto: se escribe de nuevo junto con las filas
+                # nuevas al final; el original queda como espacio muerto hasta compact()
+                with open(self.path, "rb") as f:
+                    f.seek(int(last["offset"]))
+                    tail = self._decode_block(f.read(int(last["length"])), int(last["rows"]))
+                tail_scaled = {name: np.rint(tail[name].astype(np.float64) * scale).astype(np.int64)
+                               for name, scale in self.schema}
+                scaled = {name: np.concatenate([tail_scaled[name], scaled[name]]) for name in scaled}
+                count += int(last["rows"])
+                entries = entries[:-1]
+
+        with open(self.path, "r+b") as f:
+            # Solo se descarta lo posterior al último footer válido (restos de un append fallido)
+            f.seek(end)
+            f.truncate()
+            for lo in range(0, count, self.block_size):
+                hi = min(lo + self.block_size, count)
+                payload = self._encode_block(scaled, lo, hi)
+                entries.append((f.tell(), len(payload), hi - lo,
+                                int(scaled[ts_field][lo]), int(scaled[ts_field][hi - 1])))
+                f.write(payload)
+            new_index = np.array(entries, dtype=_INDEX_DTYPE)
+            index_offset = f.tell()
+            f.write(new_index.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            # El footer se escribe al final: hasta entonces el footer anterior sigue vigente
+            f.write(_FOOTER.pack(index_offset, len(new_index), FOOTER_MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._dead_ratio(new_index) > 0.5:
+            self.compact()
+        return written
+
+    def _dead_ratio(self, index):
+        size = os.path.getsize(self.path)
+        live = int(index["length"].sum()) + index.nbytes + _FOOTER.size
+        return 1 - live / size if size > 1024 * 1024 else 0.0
+
+    def compact(self):
+        """Reescribe solo los bloques vigentes en un archivo temporal y lo reemplaza atómicamente."""
+        index, _, _ = self._read_index()
+        if not len(index):
+            return
+        tmp = self.path + ".tmp"
+        header = json.dumps(self.schema).encode()
+        with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+            dst.write(_HEADER.pack(MAGIC, VERSION, len(header)) + header)
+            entries = []
+            for entry in index:
+                src.seek(int(entry["offset"]))
+                entries.append((dst.tell(), entry["length"], entry["rows"], entry["first_ts"], entry["last_ts"]))
+                dst.write(src.read(int(entry["length"])))
+            new_index = np.array(entries, dtype=_INDEX_DTYPE)
+            index_offset = dst.tell()
+            dst.write(new_index.tobytes())
+            dst.write(_FOOTER.pack(index_offset, len(new_index), FOOTER_MAGIC))
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, self.path)
+
+    def info(self):
+        index, _ = self.index()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        rows = int(index["rows"].sum()) if len(index) else 0
+        return {"blocks": len(index), "rows": rows, "bytes": size,
+                "bytes_per_row": size / rows if rows else 0.0,
+                "first_ts": int(index[0]["first_ts"]) if rows else None,
+                "last_ts": int(index[-1]["last_ts"]) if rows else None}
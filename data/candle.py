@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+# Campos de una vela en el orden usado para CSV y arreglos estructurados
+CANDLE_FIELDS = ('timestamp', 'open', 'close', 'min', 'max', 'volume')
+
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', np.int64),
+    ('open', np.float64),
+    ('close', np.float64),
+    ('min', np.float64),
+    ('max', np.float64),
+    ('volume', np.float64),
+])
+
+class Candle:
+    """Vela OHLCV compacta (sin __dict__) para el camino en tiempo real."""
+    __slots__ = CANDLE_FIELDS
+
+    def __init__(self, timestamp, open, close, min, max, volume=0.0):
+        self.timestamp = int(timestamp)
+        self.open = float(open)
+        self.close = float(close)
+        self.min = float(min)
+        self.max = float(max)
+        self.volume = float(volume)
+
+    @classmethod
+    def from_dict(cls, raw):
+        """Convierte una vela de la API (usa 'from') o de CSV (usa 'timestamp')."""
+        ts = raw['timestamp'] if 'timestamp' in raw else raw['from']
+        return cls(ts, raw['open'], raw['close'], raw['min'], raw['max'], raw.get('volume', 0.0))
+
+    @classmethod
+    def coerce(cls, value):
+        return value if isinstance(value, cls) else cls.from_dict(value)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in CANDLE_FIELDS}
+
+    def to_tuple(self):
+        return tuple(getattr(self, field) for field in CANDLE_FIELDS)
+
+    def __eq__(self, other):
+        return isinstance(other, Candle) and self.to_tuple() == other.to_tuple()
+
+    def __repr__(self):
+        return (f"Candle(ts={self.timestamp}, o={self.open}, c={self.close}, "
+                f"min={self.min}, max={self.max}, v={self.volume})")
+
+def candles_to_array(candles):
+    """Lista de velas (Candle o dict) -> arreglo estructurado NumPy."""
+    return np.array([Candle.coerce(c).to_tuple() for c in candles], dtype=CANDLE_DTYPE)
+
+def candles_to_frame(candles):
+    """Lista de velas -> DataFrame con columnas CANDLE_FIELDS (sin diccionarios intermedios)."""
+    return pd.DataFrame(candles_to_array(candles))
+
+def frame_to_candles(df):
+    """DataFrame de velas -> lista de Candle. Acepta la columna 'from' de la API."""
+    if 'timestamp' not in df.columns and 'from' in df.columns:
+        df = df.rename(columns={'from': 'timestamp'})
+    if 'volume' not in df.columns:
+        df = df.assign(volume=0.0)
+    columns = [df[field].values for field in CANDLE_FIELDS]
+    return [Candle(*row) for row in zip(*columns)]
@@ -1,26 +1,43 @@
+import sys
 import time
 import threading
 import pandas as pd
 from iqoptionapi.stable_api import IQ_Option
 from utils.logger import setup_logger
 from utils.data_utils import clean_data
+from data.candle import Candle, candles_to_frame
+from data.data_storage import DataStorage
+from data.timeframes import TimeframeAggregator
+from utils.memory import candles_bytes
 
 logger = setup_logger()
 
 class DataCollector:
-    def __init__(self, config):
+    def __init__(self, config, api=None):
         self.config = config
         self.logger = logger
         self.buffer = []
+        self.storage = DataStorage(self.config.csv_path, self.config.archive_path, self.config.tick_archive_path)
+        self.tick_buffer = []
         self.last_cleanup_time = time.time()
         self.cleanup_interval = 3 * 3600  # Cada 3 horas
         self.running = False
         self.thread = None
-        self.api = self.connect_api()
+        self.listeners = []
+        self.last_candle = None
+        # Velas de marcos mayores derivadas de las de 1 minuto (sin streams adicionales)
+        self.timeframes = TimeframeAggregator(self.config.candle_size, self.config.timeframes)
+        # Se puede inyectar una API (p. ej. FakeIQOption) para pruebas de carga offline
+        self.api = api if api is not None else self.connect_api()
     
     def connect_api(self):
         try:
-            api = IQ_Option(self.config.email, self.config.password)
+            if self.config.simulate:
+                from simulation.fake_iq_option import FakeIQOption, load_candles
+                api = FakeIQOption(load_candles(self.config.simulation_source), speed=self.config.simulation_speed)
+                self.logger.info(f"🧪 Usando el simulador de IQ Option (x{self.config.simulation_speed}) con {self.config.simulation_source}")
+            else:
+                api = IQ_Option(self.config.email, self.config.password)
             api.connect()
             if api.check_connect():
                 self.logger.info(f"📡 Conectado a IQ Option en modo {self.config.mode}")
@@ -60,7 +77,18 @@ class DataCollector:
         return candles
 
     def collect_data(self, new_data):
-        self.buffer.append(new_data)
+        candle = Candle.coerce(new_data)
+        # Una vela con timestamp nuevo implica que la anterior cerró
+        if self.last_candle is not None and candle.timestamp > self.last_candle.timestamp:
+            self.timeframes.add_closed(self.last_candle)
+        self.last_candle = candle
+        if self.config.archive_ticks:
+            self.tick_buffer.append({'timestamp': time.time_ns(), 'price': candle.close, 'volume': candle.volume})
+        # El stream devuelve la vela en curso cada segundo: se actualiza en lugar de duplicarla
+        if self.buffer and self.buffer[-1].timestamp == candle.timestamp:
+            self.buffer[-1] = candle
+        else:
+            self.buffer.append(candle)
         if time.time() - self.last_cleanup_time >= self.cleanup_interval:
             self.cleanup_data()
 
@@ -68,10 +96,15 @@ class DataCollector:
         if not self.buffer:
             self.logger.info("🧹 No hay datos para limpiar.")
             return
-        df = pd.DataFrame(self.buffer)
-        df.to_csv(self.config.csv_path, index=False)
-        self.logger.info(f"💾 Guardadas {len(df)} velas en {self.config.csv_path}")
-        self.buffer = []
+        self.storage.save_candles(self.buffer, append=True)
+        # Solo las velas cerradas pasan al archivo de largo plazo
+        closed = [c for c in self.buffer if self.last_candle is None or c.timestamp < self.last_candle.timestamp]
+        self.storage.archive_candles(closed)
+        self.storage.archive_ticks(self.tick_buffer)
+        self.tick_buffer = []
+        self.logger.info(f"💾 Guardadas {len(self.buffer)} velas en {self.config.csv_path}")
+        # La vela en curso se conserva para archivarla cuando cierre
+        self.buffer = [self.last_candle] if self.last_candle is not None else []
         self.last_cleanup_time = time.time()
 
     def _realtime_loop(self):
@@ -80,11 +113,73 @@ class DataCollector:
             candles = self.api.get_realtime_candles(self.config.data_assets, 60)
             if candles:
                 latest_timestamp = max(candles.keys())
-                latest_candle = candles[latest_timestamp]
-                self.logger.info(f"🕯️ Nueva vela: {latest_candle}")
+                latest_candle = Candle.from_dict(candles[latest_timestamp])
+                self.logger.debug("🕯️ Nueva vela: %s", latest_candle)
                 self.collect_data(latest_candle)
+                for listener in self.listeners:
+                    listener(latest_candle)
             time.sleep(1)
 
+    def add_listener(self, callback):
+        """Registra una función que recibe cada vela del stream (p. ej. CycleScheduler.notify_tick)."""
+        self.listeners.append(callback)
+
+    def recent_frame(self):
+        """Velas en memoria aún no volcadas a disco, como DataFrame."""
+        return candles_to_frame(list(self.buffer))
+
+    def realtime_frame(self, closed_before=None):
+        """
+        Histórico en disco más las velas del stream aún no volcadas, con las columnas de
+        marcos mayores (close_5m, max_1h, ...) para estrategias y modelo. Con closed_before
+        solo quedan las velas cerradas (las abiertas antes de ese instante).
+        """
+        data = pd.read_csv(self.config.csv_path)
+        if 'timestamp' not in data.columns and 'from' in data.columns:
+            data.rename(columns={'from': 'timestamp'}, inplace=True)
+        recent = self.recent_frame()
+        if not recent.empty:
+            data = pd.concat([data, recent]).drop_duplicates(subset=['timestamp'], keep='last')
+            data = data.sort_values('timestamp').reset_index(drop=True)
+        if closed_before is not None:
+            data = data[data['timestamp'] < closed_before].reset_index(drop=True)
+        return self.timeframes.add_columns(data)
+
+    def memory_bytes(self):
+        """Tamaño aproximado de los buffers en memoria (velas y ticks sin volcar)."""
+        ticks = sys.getsizeof(self.tick_buffer[0]) * len(self.tick_buffer) if self.tick_buffer else 0
+        return candles_bytes(self.buffer) + ticks
+
+    def request_flush(self):
+        """Adelanta el volcado a disco: se hace con la próxima vela, en el hilo del stream."""
+        self.last_cleanup_time = 0
+
+    def snapshot_state(self):
+        """Velas en memoria y marcos mayores, para el arranque en caliente."""
+        return {"buffer": [c.to_dict() for c in list(self.buffer)],
+                "last_candle": self.last_candle.to_dict() if self.last_candle is not None else None,
+                "timeframes": self.timeframes.state()}
+
+    def restore_state(self, state):
+        """Restaura el estado de una instantánea y completa con la API las velas del tiempo caído."""
+        self.buffer = [Candle.from_dict(c) for c in state["buffer"]]
+        self.last_candle = Candle.from_dict(state["last_candle"]) if state["last_candle"] else None
+        self.timeframes.restore(state["timeframes"])
+        if self.last_candle is None:
+            return
+        missing = int((time.time() - self.last_candle.timestamp) // self.config.candle_size)
+        if missing <= 0:
+            return
+        try:
+            gap = self.api.get_candles(self.config.data_assets, self.config.candle_size, min(missing + 1, 1000), time.time())
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudieron recuperar las velas del tiempo caído: {e}")
+            return
+        for candle in sorted((Candle.from_dict(c) for c in gap or []), key=lambda c: c.timestamp):
+            if candle.timestamp >= self.last_candle.timestamp:
+                self.collect_data(candle)
+        self.logger.info(f"♻️ Recuperadas {len(gap or [])} velas del tiempo caído")
+
     def start_realtime(self):
         self.running = True
         self.thread = threading.Thread(target=self._realtime_loop)
@@ -1,32 +1,91 @@
+import io
 import pandas as pd
 import os
 from utils.logger import setup_logger
+from data.candle import Candle, CANDLE_FIELDS, candles_to_frame, frame_to_candles
+from data.archive import DeltaArchive, CANDLE_SCHEMA, TICK_SCHEMA
+
+CSV_TAIL_CHUNK = 64 * 1024
 
 class DataStorage:
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, archive_path=None, tick_archive_path=None):
         self.csv_path = csv_path
         self.logger = setup_logger()
+        # Historial de largo plazo comprimido (opcional) para entrenamiento y backtests
+        self.archive = DeltaArchive(archive_path, CANDLE_SCHEMA) if archive_path else None
+        self.tick_archive = DeltaArchive(tick_archive_path, TICK_SCHEMA) if tick_archive_path else None
 
     def save_candles(self, candles, append=True):
         try:
-            df = pd.DataFrame(candles)
-            if append and self.has_data():
-                # Cargar datos existentes
-                existing_df = self.load_candles()
-                # Combinar y eliminar duplicados basados en timestamp ('from')
-                combined_df = pd.concat([existing_df, df]).drop_duplicates(subset=['from'], keep='last')
-                combined_df.to_csv(self.csv_path, index=False)
+            candles = [Candle.coerce(c) for c in candles]
+            if append and candles and self.has_data() and self._csv_header() == list(CANDLE_FIELDS):
+                self._merge_tail(candles)
+            elif append and self.has_data():
+                # CSV con otro formato (p. ej. columna 'from'): se combina completo y se migra
+                merged = {c.timestamp: c for c in self.load_candles()}
+                merged.update((c.timestamp, c) for c in candles)
+                combined = [merged[ts] for ts in sorted(merged)]
+                candles_to_frame(combined).to_csv(self.csv_path, index=False)
             else:
-                df.to_csv(self.csv_path, index=False)
+                candles_to_frame(candles).to_csv(self.csv_path, index=False)
             self.logger.info(f"Guardadas {len(candles)} velas en {self.csv_path}")
         except Exception as e:
             self.logger.error(f"Error al guardar velas: {e}")
 
+    def _csv_header(self):
+        with open(self.csv_path) as f:
+            return f.readline().strip().split(",")
+
+    def _tail_offset(self, since):
+        """
+        Offset del CSV (ordenado por timestamp) de la primera fila con timestamp >= since.
+        Se lee hacia atrás por bloques, así que solo se recorren las filas a reemplazar.
+        """
+        with open(self.csv_path, "rb") as f:
+            f.readline()
+            data_start = f.tell()
+            pos = offset = f.seek(0, os.SEEK_END)
+            pending = b""  # Bytes [pos, offset) aún sin revisar
+            while offset > data_start:
+                newline = pending.rfind(b"\n", 0, len(pending) - 1)
+                if newline < 0 and pos > data_start:
+                    step = min(CSV_TAIL_CHUNK, pos - data_start)
+                    pos -= step
+                    f.seek(pos)
+                    pending = f.read(step) + pending
+                    continue
+                line = pending[newline + 1:]
+                if line.strip() and int(float(line.split(b",", 1)[0])) < since:
+                    break
+                offset = pos + newline + 1
+                pending = pending[:newline + 1]
+            return offset
+
+    def _merge_tail(self, candles):
+        """
+        Agrega las velas al final del CSV. Solo las filas existentes con timestamp igual
+        o posterior a la vela más antigua recibida se leen y se reescriben (por timestamp
+        gana la vela más reciente); el resto del archivo no se toca.
+        """
+        merged = {}
+        offset = self._tail_offset(min(c.timestamp for c in candles))
+        with open(self.csv_path, "r+b") as f:
+            f.seek(offset)
+            tail = f.read()
+            if tail.strip():
+                header = ",".join(CANDLE_FIELDS).encode() + b"\n"
+                merged = {c.timestamp: c for c in frame_to_candles(pd.read_csv(io.BytesIO(header + tail)))}
+            merged.update((c.timestamp, c) for c in candles)
+            f.seek(offset)
+            f.truncate()
+        with open(self.csv_path, "a", newline="") as f:
+            candles_to_frame([merged[ts] for ts in sorted(merged)]).to_csv(f, header=False, index=False)
+
     def load_candles(self):
         try:
             if self.has_data():
                 df = pd.read_csv(self.csv_path)
-                return df.to_dict('records')
+                return frame_to_candles(df)
             return []
         except Exception as e:
             self.logger.error(f"Error al cargar velas: {e}")
@@ -36,4 +95,48 @@ class DataStorage:
         exists = os.path.exists(self.csv_path)
         size = os.path.getsize(self.csv_path) if exists else 0
         self.logger.debug(f"Verificando datos - Archivo: {self.csv_path}, Existe: {exists}, Tamaño: {size} bytes")
-        return exists and size > 0
\ No newline at end of file
+        return exists and size > 0
+
+    def archive_candles(self, candles):
+        """Agrega velas al archivo comprimido; las ya archivadas (por timestamp) se ignoran."""
+        if self.archive is None or not candles:
+            return 0
+        try:
+            written = self.archive.append(candles_to_frame([Candle.coerce(c) for c in candles]))
+            self.logger.info(f"🗜️ Archivadas {written} velas en {self.archive.path}")
+            return written
+        except Exception as e:
+            self.logger.error(f"Error al archivar velas: {e}")
+            return 0
+
+    def archive_ticks(self, ticks):
+        """Agrega ticks (timestamp, price, volume) al archivo comprimido de ticks."""
+        if self.tick_archive is None or not ticks:
+            return 0
+        try:
+            return self.tick_archive.append(ticks)
+        except Exception as e:
+            self.logger.error(f"Error al archivar ticks: {e}")
+            return 0
+
+    def archive_csv(self, df=None):
+        """Migra el CSV actual (o el DataFrame ya cargado) al archivo comprimido."""
+        if self.archive is None or (df is None and not self.has_data()):
+            return 0
+        if df is None:
+            df = pd.read_csv(self.csv_path)
+        if 'timestamp' not in df.columns and 'from' in df.columns:
+            df = df.rename(columns={'from': 'timestamp'})
+        return self.archive.append(df)
+
+    def load_history(self, start=None, end=None):
+        """Historial completo (o un rango de timestamps) desde el archivo comprimido como DataFrame."""
+        if self.archive is None:
+            return pd.DataFrame()
+        return self.archive.read_frame(start, end)
+
+    def iter_history(self, start=None, end=None):
+        """Recorre el historial bloque a bloque como arreglos NumPy, sin cargarlo entero en memoria."""
+        if self.archive is None:
+            return iter(())
+        return self.archive.iter_blocks(start, end)
@@ -0,0 +1,165 @@
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from data.candle import Candle, candles_to_array
+from utils.memory import candles_bytes
+
+AGGREGATED_FIELDS = ('open', 'close', 'min', 'max', 'volume')
+
+def timeframe_label(seconds):
+    """300 -> '5m', 3600 -> '1h'."""
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+def timeframe_column(field, seconds):
+    return f"{field}_{timeframe_label(seconds)}"
+
+class TimeframeAggregator:
+    """
+    Deriva velas de marcos temporales mayores (5m, 15m, 1h...) a partir de las velas
+    cerradas de 1 minuto, sin streams ni descargas adicionales. Se actualiza de forma
+    incremental con add_closed() y se puede reconstruir vectorizado con backfill().
+    Solo se exponen velas mayores cerradas, para no filtrar información futura.
+    El hilo del stream agrega velas mientras el ciclo las consulta: el estado se
+    protege con un lock.
+    """
+
+    def __init__(self, base_size=60, timeframes=(300, 900, 3600), max_bars=1000):
+        for tf in timeframes:
+            if tf % base_size != 0 or tf <= base_size:
+                raise ValueError(f"El marco {tf}s debe ser múltiplo mayor de la vela base ({base_size}s)")
+        self.base_size = base_size
+        self.timeframes = list(timeframes)
+        self.max_bars = max_bars
+        self._closed = {tf: deque(maxlen=max_bars) for tf in self.timeframes}
+        self._partial = {tf: None for tf in self.timeframes}
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+    def add_closed(self, candle):
+        """Incorpora una vela base cerrada a todos los marcos."""
+        candle = Candle.coerce(candle)
+        with self._lock:
+            self._add_closed(candle)
+
+    def _add_closed(self, candle):
+        for tf in self.timeframes:
+            bucket = candle.timestamp - candle.timestamp % tf
+            partial = self._partial[tf]
+            if partial is not None and partial.timestamp == bucket:
+                partial.max = max(partial.max, candle.max)
+                partial.min = min(partial.min, candle.min)
+                partial.close = candle.close
+                partial.volume += candle.volume
+            else:
+                if partial is not None:
+                    self._close(tf, partial)
+                partial = Candle(bucket, candle.open, candle.close, candle.min, candle.max, candle.volume)
+            # Última vela base del intervalo: la vela mayor queda cerrada
+            if candle.timestamp + self.base_size >= bucket + tf:
+                self._close(tf, partial)
+                partial = None
+            self._partial[tf] = partial
+
+    def _close(self, tf, bar):
+        bars = self._closed[tf]
+        if bars and bars[-1].timestamp >= bar.timestamp:
+            return
+        bars.append(bar)
+        self._arrays.pop(tf, None)
+
+    def backfill(self, data):
+        """Reconstruye todos los marcos desde el histórico (DataFrame de velas base) en una pasada vectorizada."""
+        if 'timestamp' not in data.columns and 'from' in data.columns:
+            data = data.rename(columns={'from': 'timestamp'})
+        if data.empty:
+            return
+        data = data.drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp')
+        ts = data['timestamp'].to_numpy(dtype=np.int64)
+        for tf in self.timeframes:
+            grouped = data.assign(bucket=ts - ts % tf).groupby('bucket', sort=True).agg(
+                open=('open', 'first'), close=('close', 'last'), min=('min', 'min'),
+                max=('max', 'max'), volume=('volume', 'sum'), last=('timestamp', 'max'))
+            complete = grouped['last'].to_numpy() + self.base_size >= grouped.index.to_numpy() + tf
+            bars = [Candle(b, *row) for b, row in zip(grouped.index.to_numpy(),
+                                                      grouped[list(AGGREGATED_FIELDS)].to_numpy())]
+            # Solo el último intervalo puede seguir abierto; los anteriores (aun con huecos) están cerrados
+            if bars and not complete[-1]:
+                closed, partial = bars[:-1], bars[-1]
+            else:
+                closed, partial = bars, None
+            with self._lock:
+                self._partial[tf] = partial
+                self._closed[tf] = deque(closed[-self.max_bars:], maxlen=self.max_bars)
+                self._arrays.pop(tf, None)
+
+    def state(self):
+        """Estado serializable (velas cerradas y parciales por marco) para instantáneas."""
+        with self._lock:
+            return {str(tf): {"closed": [c.to_dict() for c in self._closed[tf]],
+                              "partial": self._partial[tf].to_dict() if self._partial[tf] is not None else None}
+                    for tf in self.timeframes}
+
+    def restore(self, state):
+        with self._lock:
+            for tf in self.timeframes:
+                entry = state.get(str(tf))
+                if entry is None:
+                    continue
+                self._closed[tf] = deque((Candle.from_dict(c) for c in entry["closed"]), maxlen=self.max_bars)
+                self._partial[tf] = Candle.from_dict(entry["partial"]) if entry["partial"] else None
+                self._arrays.pop(tf, None)
+
+    def memory_bytes(self):
+        """Velas retenidas más los arreglos en caché (para el presupuesto de memoria)."""
+        with self._lock:
+            candles = sum(len(bars) for bars in self._closed.values())
+            arrays = sum(a.nbytes for a in self._arrays.values())
+        return candles_bytes([Candle(0, 0, 0, 0, 0)]) * candles + arrays
+
+    def bars(self, tf):
+        """Velas cerradas del marco como arreglo estructurado (en caché hasta el próximo cierre)."""
+        # Bajo el lock: el deque no cambia mientras se copia y un cierre concurrente no
+        # puede quedar tapado por un arreglo armado antes de él
+        with self._lock:
+            if tf not in self._arrays:
+                self._arrays[tf] = candles_to_array(self._closed[tf])
+            return self._arrays[tf]
+
+    def frame(self, tf):
+        return pd.DataFrame(self.bars(tf))
+
+    def aligned(self, timestamps, tf):
+        """
+        Para cada vela base (por su timestamp de apertura) devuelve los campos de la
+        última vela mayor ya cerrada a su cierre. Las filas sin vela previa quedan en NaN.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        bars = self.bars(tf)
+        out = {field: np.full(len(timestamps), np.nan) for field in AGGREGATED_FIELDS}
+        if not len(bars):
+            return out
+        ends = bars['timestamp'] + tf
+        idx = np.searchsorted(ends, timestamps + self.base_size, side='right') - 1
+        valid = idx >= 0
+        for field in AGGREGATED_FIELDS:
+            out[field][valid] = bars[field][idx[valid]]
+        return out
+
+    def add_columns(self, data):
+        """Devuelve una copia de data con columnas '{campo}_{marco}' (p. ej. close_5m) alineadas."""
+        columns = {}
+        for tf in self.timeframes:
+            for field, values in self.aligned(data['timestamp'].to_numpy(), tf).items():
+                columns[timeframe_column(field, tf)] = values
+        return data.assign(**columns)
+
+def timeframe_columns(data, timeframes, base_size=60):
+    """Versión sin estado para históricos: backfill vectorizado + alineación en una llamada."""
+    aggregator = TimeframeAggregator(base_size, timeframes, max_bars=len(data) + 1)
+    aggregator.backfill(data)
+    return aggregator.add_columns(data)
@@ -2,13 +2,14 @@ import time
 from utils.logger import setup_logger
 
 class TradeExecutor:
-    def __init__(self, config):
+    def __init__(self, config, journal=None):
         self.api = config.api
         self.asset = config.data_order  # Usar EURUSD-op para órdenes
         self.mode = config.mode
         self.logger = setup_logger()
+        self.journal = journal  # TradeJournal opcional
 
-    def execute_trade(self, direction, amount):
+    def execute_trade(self, direction, amount, decision_id=None):
         expiration = 1  # 1 minuto
         try:
             check, trade_id = self.api.buy(amount, self.asset, direction, expiration)
@@ -16,6 +17,8 @@ class TradeExecutor:
 
             if check:
                 self.logger.info(f"Operación ejecutada: {direction} por {amount} en {self.asset} modo {self.mode}, Trade ID: {trade_id}")
+                if self.journal is not None and decision_id is not None:
+                    self.journal.record_order(decision_id, trade_id, amount)
                 while True:
                     result = check_method(trade_id)
                     if result is not None:
@@ -26,6 +29,8 @@ class TradeExecutor:
                         else:
                             profit = 0
                         self.logger.info(f"Resultado: {profit if profit > 0 else 'Pérdida'}")
+                        if self.journal is not None and decision_id is not None:
+                            self.journal.record_result(decision_id, profit)
                         break
                     time.sleep(0.5)
             else:
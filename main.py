@@ -11,9 +11,16 @@ from utils.visual_logger import VisualLogger
 from data.data_collector import DataCollector
 from analysis.label_generator import LabelGenerator
 from analysis.ml_model import MLModel
-from analysis.strategy_analyzer import StrategyAnalyzer
+from analysis.strategy_analyzer import StrategyAnalyzer, load_decision_params
 from trading.trader import Trader
-from strategies.strategy_signals import get_all_signals
+from trading.scheduler import CycleScheduler
+from trading.trade_journal import TradeJournal
+from trading.cycle_executor import CycleExecutor
+from trading.decision_cycle import DecisionCycle
+from strategies import candle_patterns
+from risk.risk_engine import RiskEngine
+from utils.state_snapshot import StateSnapshot
+from utils.memory import MemoryManager, MB
 
 logger = setup_logger()
 visual_logger = VisualLogger(refresh_interval=1)
@@ -48,7 +55,7 @@ def verify_asset_availability(api, asset, mode):
             candles = api.get_candles(asset, 60, 1)
             
         if candles:
-            logger.info(f"Se recibieron velas para el activo {asset}.")
+            logger.info("Se recibieron velas para el activo %s.", asset)
             return True
         else:
             logger.error(f"No se recibieron velas para el activo {asset}.")
@@ -67,9 +74,43 @@ def should_stop_operating(config, safety_margin_minutes=10):
         return True
     return False
 
+# Componentes con presupuesto de memoria y su forma de liberar espacio
+def register_memory_components(memory, collector, ml_model):
+    memory.register("candle_buffer", collector.memory_bytes, collector.request_flush)
+    # Los marcos mayores están acotados por max_bars (unos cientos de KB) y sus arreglos se
+    # reconstruyen en cada ciclo: desalojarlos no libera nada útil, solo se miden
+    memory.register("timeframes", collector.timeframes.memory_bytes)
+    # Cachés de patrones por vela: la de la estrategia y, si se usan como features, la del modelo
+    scanners = [candle_patterns.scanner] + [s for s in (ml_model.pattern_scanner,) if s is not None]
+    memory.register("feature_cache", lambda: sum(s.memory_bytes() for s in scanners),
+                    lambda: [s.clear() for s in scanners])
+    # El modelo no se desaloja (predict lo necesita en cada ciclo): solo se mide y su
+    # presupuesto se verifica al arrancar
+    memory.register("model", ml_model.memory_bytes)
+    model_bytes, budget = ml_model.memory_bytes(), memory.components["model"].budget
+    if budget and model_bytes > budget:
+        logger.warning("⚠️ El modelo ocupa %.1f MB y supera su presupuesto de %.1f MB",
+                       model_bytes / MB, budget / MB)
+
+# Estado de ejecución para la instantánea de arranque en caliente
+def runtime_state(collector, risk_engine, ml_model, cycle_start):
+    return {
+        "collector": collector.snapshot_state(),
+        "risk": risk_engine.snapshot_state(),
+        "model_version": ml_model.bundle.version if ml_model.bundle is not None else None,
+        "cycle": {"elapsed": time.time() - cycle_start},
+    }
+
 def signal_handler(sig, frame):
     logger.info("🛑 Interrupción recibida, deteniendo el bot de forma controlada...")
+    if state_builder is not None:
+        state_snapshot.save(state_builder())
     collector.stop()
+    risk_engine.stop()
+    memory.stop()
+    if cycle_executor is not None:
+        cycle_executor.shutdown()
+    journal.close()
     logger.info("✅ Bot detenido exitosamente")
     global running
     running = False
@@ -78,11 +119,23 @@ if __name__ == "__main__":
     config = Config()
     print_config(config)  # Imprime la configuración en los logs
 
+    journal = TradeJournal(config.journal_path)
+    cycle_executor = None
+    state_snapshot = StateSnapshot(config.snapshot_path, config.snapshot_interval, config.snapshot_max_age)
+    state_builder = None
+    memory = MemoryManager.from_config(config)
+
     try:
         collector = DataCollector(config)
     except Exception as e:
         logger.error(f"❌ Error al inicializar DataCollector: {e}")
         sys.exit(1)
+
+    # Saldo y exposición locales, conciliados con la API en segundo plano
+    risk_engine = RiskEngine.from_config(config, collector.api)
+    # Los resultados llegan al diario por id de orden, los liquide el ciclo o la conciliación
+    risk_engine.add_listener(journal.record_settlement)
+    risk_engine.start()
         
     signal.signal(signal.SIGINT, signal_handler)
 
@@ -95,6 +148,12 @@ if __name__ == "__main__":
     if should_stop_operating(config, safety_margin_minutes=10):
         logger.error("El mercado está a punto de cerrar. Deteniendo el bot. Revise la configuración del activo a operar.")
         sys.exit(1)
+
+    # Arranque en caliente: buffers, marcos mayores y posiciones de la última instantánea
+    saved_state = state_snapshot.load()
+    if saved_state is not None:
+        collector.restore_state(saved_state["collector"])
+        risk_engine.restore_state(saved_state["risk"])
     
     # Cargar datos históricos
     if os.path.exists(config.csv_path):
@@ -114,34 +173,60 @@ if __name__ == "__main__":
         historical_data.to_csv(config.csv_path, index=False)
         logger.info(f"💾 Guardados {len(historical_data)} registros en {config.csv_path}")
     
+    # El histórico se incorpora al archivo comprimido de largo plazo (solo las velas nuevas)
+    collector.storage.archive_csv(historical_data)
+
+    # Marcos mayores reconstruidos desde el histórico; luego se actualizan con cada vela cerrada
+    if saved_state is None:
+        collector.timeframes.backfill(historical_data)
+
     label_generator = LabelGenerator(config)
-    label_generator.generate_labels()
+    labels = label_generator.generate_labels(historical_data)
+    training_data = label_generator.attach_labels(historical_data, labels=labels)
     
     ml_model = MLModel(config)
-    if os.path.exists(config.model_path):
-        model_mtime = os.path.getmtime(config.model_path)
-        if time.time() - model_mtime < 3 * 3600:
-            logger.info("🔄 Modelo existente es reciente; se utilizará sin reentrenamiento.")
-        else:
-            logger.info("⏳ Modelo existente es antiguo; se procederá a reentrenar.")
-            ml_model.train(historical_data)
+    # Carga anticipada y validada del bundle: la primera predicción no paga la carga
+    # Se prefiere la versión que estaba sirviendo antes del reinicio
+    model_version = saved_state.get("model_version") if saved_state is not None else None
+    if ((model_version and ml_model.load(model_version)) or ml_model.load()) and not ml_model.is_stale():
+        logger.info("🔄 Modelo existente es reciente; se utilizará sin reentrenamiento.")
     else:
-        ml_model.train(historical_data)
+        logger.info("⏳ Modelo inexistente, inválido o antiguo; se procederá a entrenar.")
+        ml_model.train(training_data)
     
+    register_memory_components(memory, collector, ml_model)
+    memory.start()
+
+    scheduler = CycleScheduler.from_config(config)
+    collector.add_listener(scheduler.notify_tick)
     collector.start_realtime()
     
-    trader = Trader(config, collector.api)
-    strategy_analyzer = StrategyAnalyzer(ml_model)
+    trader = Trader(config, collector.api, risk_engine)
+    decision_params = load_decision_params(config.decision_params_path)
+    strategy_analyzer = StrategyAnalyzer(ml_model, decision_params["weights"])
+    # Estrategias y validación ML en paralelo con plazo por ciclo
+    cycle_executor = CycleExecutor.from_config(config, ml_model)
+    decision_cycle = DecisionCycle(config, cycle_executor, strategy_analyzer, scheduler, trader, journal,
+                                   decision_params)
     
     # Variables para el ciclo de análisis
-    min_analysis_period = 300        # 5 minutos de análisis inicial sin operar
-    extra_confidence_factor = 0.001    # Incremento de confianza por segundo extra
-    MIN_CONFIDENCE_THRESHOLD = 1.0     # Umbral mínimo para emitir una orden
+    min_analysis_period = decision_params["min_analysis_period"]        # Análisis inicial sin operar (seg)
+    MIN_CONFIDENCE_THRESHOLD = decision_params["min_confidence"]         # Umbral mínimo para emitir una orden
     cycle_start = time.time()          # Marca de inicio del ciclo
+    if saved_state is not None:
+        # Se conserva el tiempo de análisis acumulado: sin recalibrar tras un reinicio
+        cycle_start -= saved_state["cycle"]["elapsed"]
+    state_builder = lambda: runtime_state(collector, risk_engine, ml_model, cycle_start)
     running = True
 
     logger.info("Iniciando ciclo de análisis y operaciones...")
     while running:
+        # Espera al cierre de vela (o al tick con debounce) en lugar de un sleep fijo
+        bar_close = scheduler.wait_next()
+        if not running:
+            break
+        state_snapshot.maybe_save(state_builder)
+
         if should_stop_operating(config, safety_margin_minutes=10):
             logger.error("El mercado está a punto de cerrar. Deteniendo el bot. Revise la configuración del activo a operar.")
             sys.exit(1)
@@ -150,11 +235,9 @@ if __name__ == "__main__":
             logger.error("El activo se encuentra cerrado o inaccesible. Deteniendo el bot.")
             sys.exit(1)
         
-        realtime_data = pd.read_csv(config.csv_path)
-        if 'timestamp' not in realtime_data.columns and 'from' in realtime_data.columns:
-            realtime_data.rename(columns={'from': 'timestamp'}, inplace=True)
+        # En modo 'close' se decide sobre la vela recién cerrada, no sobre la que acaba de abrir
+        realtime_data = collector.realtime_frame(bar_close if scheduler.mode == "close" else None)
         if len(realtime_data) < ml_model.sequence_length:
-            time.sleep(1)
             continue
 
         current_time = time.time()
@@ -163,38 +246,18 @@ if __name__ == "__main__":
         # Fase de calibración: durante los primeros 5 minutos se acumulan datos sin operar.
         if elapsed < min_analysis_period:
             visual_logger.update(f"🔍 Reconociendo mercado. Tiempo transcurrido: {int(elapsed)} seg")
-            time.sleep(1)
             continue
         else:
             visual_logger.clear()
+
+        decision = decision_cycle.decide(realtime_data, elapsed, bar_close)
+        if decision is None:
+            continue
         
-        # Fase dinámica: evaluar señales y acumular confianza.
-        signals = get_all_signals(realtime_data, news=None)
-        logger.info(f"Señales generadas: {signals}")
-        
-        consolidated_signal = strategy_analyzer.consolidate_signals(signals, realtime_data)
-        base_confidence = consolidated_signal.get("confidence", 0)
-        direction = consolidated_signal.get("direction")
-        logger.info(f"Señal consolidada preliminar: {direction} con confianza {base_confidence:.2f}")
-        
-        ml_validation = ml_model.predict(realtime_data)
-        logger.info(f"Validación ML: {ml_validation}")
-        if ml_validation == direction:
-            base_confidence += 0.1
-            logger.info("La validación ML coincide. Refuerzo aplicado.")
-        
-        extra_time = elapsed - min_analysis_period
-        effective_confidence = base_confidence + extra_time * extra_confidence_factor
-        
-        visual_logger.update(f"⏱️ Extra: {int(extra_time)} seg | Confianza: {effective_confidence:.2f} (umbral: {MIN_CONFIDENCE_THRESHOLD})")
+        visual_logger.update(f"⏱️ Extra: {int(decision['extra_time'])} seg | Confianza: {decision['effective_confidence']:.2f} (umbral: {MIN_CONFIDENCE_THRESHOLD})")
         
-        if direction in ["call", "put"] and effective_confidence >= MIN_CONFIDENCE_THRESHOLD:
+        if decision["actionable"]:
             visual_logger.clear()
             logger.info("Umbral alcanzado. Ejecutando operación...")
-            trader.trade(consolidated_signal)
-            logger.info("Operación ejecutada. Esperando a que finalice...")
-            trade_duration = 60  # 60 segundos
-            time.sleep(trade_duration + 5)
+            decision_cycle.execute(decision)
             cycle_start = time.time()
-        else:
-            time.sleep(1)
@@ -7,6 +7,7 @@ from tensorflow.keras.optimizers import Adam
 import os
 import time
 from utils.logger import setup_logger
+from analysis.model_variants import build_network
 
 class TradingModel:
     def __init__(self, config):
@@ -17,6 +18,13 @@ class TradingModel:
         self.logger = setup_logger()
 
     def build_model(self, input_shape):
+        architecture = getattr(self.config, 'model_architecture', 'lstm')
+        if architecture not in ('lstm', 'student'):
+            # Variantes compactas compartidas con MLModel
+            self.model = build_network(architecture, *input_shape)
+            self.model.compile(optimizer=Adam(learning_rate=0.001), loss='binary_crossentropy', metrics=['accuracy'])
+            self.logger.info(f"🛠️ Modelo {architecture.upper()} construido con éxito")
+            return
         self.model = Sequential([
             LSTM(50, return_sequences=True, input_shape=input_shape),
             Dropout(0.2),
@@ -0,0 +1,256 @@
+import time
+import itertools
+import threading
+import logging
+from risk.risk_manager import get_trade_size
+
+class RiskEngine:
+    """
+    Motor de riesgo con saldo y exposición mantenidos localmente. El saldo se
+    actualiza con cada orden abierta/cerrada y se concilia con la API en un hilo
+    de fondo, de modo que la ruta decisión -> orden no hace ninguna llamada extra.
+    El monto permitido por activo se precalcula en cada cambio del libro y se
+    reserva de forma atómica, para respetar los límites de cartera con
+    operaciones concurrentes:
+    - risk_percentage: fracción del capital (saldo + exposición abierta) por operación.
+    - max_open_trades: operaciones abiertas (o reservadas) simultáneas.
+    - max_exposure / max_asset_exposure: fracción del capital comprometida en total / por activo.
+    - daily_loss_limit: pérdida realizada del día (fracción del capital inicial) que bloquea operar.
+    """
+
+    def __init__(self, api, risk_percentage=0.05, max_open_trades=3, max_exposure=0.15,
+                 max_asset_exposure=0.10, daily_loss_limit=0.10, min_stake=1.0,
+                 reconcile_interval=60.0, settle_grace=5.0):
+        self.logger = logging.getLogger()
+        self.api = api
+        self.risk_percentage = risk_percentage
+        self.max_open_trades = max_open_trades
+        self.max_exposure = max_exposure
+        self.max_asset_exposure = max_asset_exposure
+        self.daily_loss_limit = daily_loss_limit
+        self.min_stake = min_stake
+        self.reconcile_interval = reconcile_interval
+        self.settle_grace = settle_grace
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self.balance = None
+        self.positions = {}          # reserva -> {asset, amount, order_id, expires}
+        self._by_order = {}          # order_id -> reserva
+        self._stakes = {}            # activo -> (monto permitido, motivo de bloqueo)
+        self._day = None
+        self.day_start_equity = 0.0
+        self.realized_pnl = 0.0
+        self.last_reconcile = None
+        self.listeners = []
+        self.reconcile(force_log=True)
+
+    @classmethod
+    def from_config(cls, config, api):
+        return cls(api, config.risk_percentage, config.max_open_trades, config.max_exposure,
+                   config.max_asset_exposure, config.daily_loss_limit, config.min_stake,
+                   config.balance_reconcile_interval)
+
+    # --- Estado derivado ---
+
+    def exposure(self, asset=None):
+        return sum(p["amount"] for p in self.positions.values() if asset is None or p["asset"] == asset)
+
+    def equity(self):
+        """Capital total: saldo disponible más los montos comprometidos en operaciones abiertas."""
+        return (self.balance or 0.0) + self.exposure()
+
+    def _roll_day(self):
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        if day != self._day:
+            self._day = day
+            self.day_start_equity = self.equity()
+            self.realized_pnl = 0.0
+
+    def _compute_stake(self, asset):
+        if self.balance is None:
+            return 0.0, "saldo desconocido"
+        equity = self.equity()
+        if self.day_start_equity and self.realized_pnl <= -self.daily_loss_limit * self.day_start_equity:
+            return 0.0, f"límite de pérdida diaria alcanzado ({self.realized_pnl:.2f})"
+        if len(self.positions) >= self.max_open_trades:
+            return 0.0, f"máximo de {self.max_open_trades} operaciones abiertas"
+        stake = min(get_trade_size(equity, self.risk_percentage),
+                    self.max_exposure * equity - self.exposure(),
+                    self.max_asset_exposure * equity - self.exposure(asset),
+                    self.balance)
+        stake = int(stake * 100) / 100
+        if stake < self.min_stake:
+            return 0.0, "exposición máxima alcanzada"
+        return stake, None
+
+    def _recompute(self):
+        """Precalcula el monto permitido de cada activo conocido (llamar con el lock tomado)."""
+        self._roll_day()
+        assets = set(self._stakes) | {p["asset"] for p in self.positions.values()}
+        self._stakes = {asset: self._compute_stake(asset) for asset in assets}
+
+    def stake(self, asset):
+        """Monto permitido para el próximo trade en el activo y motivo si está bloqueado."""
+        with self._lock:
+            if asset not in self._stakes:
+                self._stakes[asset] = self._compute_stake(asset)
+            return self._stakes[asset]
+
+    # --- Libro de operaciones ---
+
+    def reserve(self, asset):
+        """
+        Reserva el monto precalculado del activo antes de enviar la orden. Devuelve
+        (reserva, monto) o (None, motivo) si los límites no lo permiten.
+        """
+        with self._lock:
+            stake, reason = self._stakes.get(asset) or self._compute_stake(asset)
+            if not stake:
+                self._stakes[asset] = (stake, reason)
+                return None, reason
+            reservation = self._last_id = next(self._ids)
+            self.positions[reservation] = {"asset": asset, "amount": stake, "order_id": None, "expires": None}
+            self.balance -= stake
+            self._recompute()
+            return reservation, stake
+
+    def release(self, reservation):
+        """Libera una reserva cuya orden no se envió o fue rechazada."""
+        with self._lock:
+            position = self.positions.pop(reservation, None)
+            if position is not None:
+                self.balance += position["amount"]
+                self._recompute()
+
+    def confirm(self, reservation, order_id, duration):
+        """Asocia la orden aceptada por el broker a la reserva."""
+        with self._lock:
+            position = self.positions.get(reservation)
+            if position is not None:
+                position["order_id"] = order_id
+                position["expires"] = time.time() + duration
+                self._by_order[order_id] = reservation
+
+    def settle(self, order_id, profit):
+        """Cierra la posición con el profit informado (negativo en pérdida). Es idempotente."""
+        if profit is None:
+            return
+        with self._lock:
+            reservation = self._by_order.pop(order_id, None)
+            position = self.positions.pop(reservation, None)
+            if position is None:
+                return
+            # Si se concilió después del vencimiento, el saldo remoto adoptado ya puede incluir
+            # el pago: no se acredita de nuevo (la próxima conciliación corrige si faltaba)
+            if not position.get("reconciled"):
+                self.balance += position["amount"] + profit
+            self.realized_pnl += profit
+            self._recompute()
+        self.logger.info("📒 Orden %s liquidada: %+.2f | saldo local %.2f | PnL del día %+.2f",
+                         order_id, profit, self.balance, self.realized_pnl)
+        for listener in self.listeners:
+            try:
+                listener(order_id, profit)
+            except Exception as e:
+                self.logger.error(f"❌ Error al notificar la liquidación de la orden {order_id}: {e}")
+
+    def add_listener(self, callback):
+        """Registra una función que recibe (order_id, profit) de cada orden liquidada (p. ej. TradeJournal.record_settlement)."""
+        self.listeners.append(callback)
+
+    # --- Conciliación en segundo plano ---
+
+    def _settle_expired(self, grace=None):
+        """Consulta el resultado de las órdenes vencidas (hace más de `grace` seg) que nadie liquidó."""
+        grace = self.settle_grace if grace is None else grace
+        now = time.time()
+        with self._lock:
+            expired = [p["order_id"] for p in self.positions.values()
+                       if p["expires"] is not None and now > p["expires"] + grace]
+        for order_id in expired:
+            try:
+                check, profit = self.api.check_win_digital_v2(order_id)
+                if check:
+                    self.settle(order_id, profit)
+            except Exception as e:
+                self.logger.warning(f"⚠️ No se pudo consultar el resultado de la orden {order_id}: {e}")
+
+    def reconcile(self, force_log=False):
+        """
+        Sincroniza el saldo local con el de la API. El broker descuenta solo las órdenes
+        confirmadas: las reservas que no estaban confirmadas al consultar (o que se
+        hicieron durante la consulta) se restan del saldo remoto. Antes se liquidan sin
+        margen las órdenes vencidas, porque el saldo remoto ya incluye su pago; las que
+        el broker aún no resolvió quedan marcadas para que settle no las acredite dos veces.
+        """
+        self._settle_expired(grace=0.0)
+        with self._lock:
+            unconfirmed = {r for r, p in self.positions.items() if p["order_id"] is None}
+            last_id = self._last_id
+        try:
+            remote = float(self.api.get_balance())
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudo conciliar el saldo: {e}")
+            return False
+        checked_at = time.time()
+        with self._lock:
+            remote -= sum(p["amount"] for r, p in self.positions.items() if r in unconfirmed or r > last_id)
+            for position in self.positions.values():
+                if position["expires"] is not None and position["expires"] <= checked_at:
+                    position["reconciled"] = True
+            drift = None if self.balance is None else remote - self.balance
+            self.balance = remote
+            self.last_reconcile = time.time()
+            self._recompute()
+        if force_log or (drift is not None and abs(drift) >= 0.01):
+            self.logger.info("🏦 Saldo conciliado: %.2f USD (desvío %s)", remote,
+                             "-" if drift is None else f"{drift:+.2f}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.reconcile_interval):
+            self.reconcile()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def snapshot_state(self):
+        """Posiciones confirmadas y PnL del día, para el arranque en caliente."""
+        with self._lock:
+            return {"positions": [p for p in self.positions.values() if p["order_id"] is not None],
+                    "day": self._day, "day_start_equity": self.day_start_equity,
+                    "realized_pnl": self.realized_pnl}
+
+    def restore_state(self, state):
+        """
+        Restaura las posiciones abiertas (el saldo del broker ya descuenta sus montos)
+        y el PnL del día; la conciliación liquida las que vencieron mientras tanto.
+        """
+        with self._lock:
+            for position in state["positions"]:
+                reservation = self._last_id = next(self._ids)
+                self.positions[reservation] = dict(position)
+                self._by_order[position["order_id"]] = reservation
+            if state["day"] == time.strftime("%Y-%m-%d", time.gmtime()):
+                self._day = state["day"]
+                self.day_start_equity = state["day_start_equity"]
+                self.realized_pnl = state["realized_pnl"]
+            self._recompute()
+        self.logger.info(f"♻️ Restauradas {len(state['positions'])} posiciones abiertas")
+
+    def snapshot(self):
+        with self._lock:
+            return {"balance": self.balance, "equity": self.equity(), "exposure": self.exposure(),
+                    "open_trades": len(self.positions), "realized_pnl": self.realized_pnl,
+                    "stakes": dict(self._stakes)}
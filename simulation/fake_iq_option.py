@@ -0,0 +1,243 @@
+import time
+import random
+import itertools
+import threading
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+class SimulatedFault(ConnectionError):
+    """Falla inyectada por el simulador."""
+
+class FakeIQOption:
+    """
+    Sustituto local de iqoptionapi.stable_api.IQ_Option con la superficie que usa
+    el bot (connect, get_candles, start_candles_stream, get_realtime_candles, buy,
+    buy_digital_option, check_win_v2, get_balance...). Reproduce velas guardadas con
+    un reloj simulado acelerado (speed), inyecta latencia y fallas por método y
+    registra el tiempo de cada llamada para pruebas de carga offline.
+
+    - candles: DataFrame con timestamp/from, open, close, min, max, volume. Se usa para
+      cualquier activo sin serie propia en `assets`, de modo que 50 activos funcionan
+      con un único histórico (cada uno con un desfase para no ser idénticos).
+    - latency: {método: (media, jitter)} en segundos reales; clave 'default' opcional.
+    - faults: {método: probabilidad} de lanzar SimulatedFault (o rechazar la orden en buy*).
+    """
+
+    def __init__(self, candles, assets=None, speed=1.0, warmup=1000, latency=None, faults=None,
+                 balance=10000.0, payout=0.85, candle_size=60, seed=None):
+        self.series = {}
+        self.default_series = self._prepare(candles)
+        for name, frame in (assets or {}).items():
+            self.series[name] = self._prepare(frame)
+        self.speed = speed
+        self.candle_size = candle_size
+        self.latency = latency or {}
+        self.faults = faults or {}
+        self.balance = float(balance)
+        self.payout = payout
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._orders = {}
+        self._order_ids = itertools.count(1)
+        self._streams = {}
+        self._asset_offsets = {}
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.connected = False
+        # La reproducción arranca tras `warmup` velas, que quedan disponibles como histórico
+        first_ts = self.default_series['timestamp']
+        self._sim_start = int(first_ts[min(warmup, len(first_ts) - 1)])
+        self._real_start = time.time()
+
+    @staticmethod
+    def _prepare(frame):
+        if 'timestamp' not in frame.columns and 'from' in frame.columns:
+            frame = frame.rename(columns={'from': 'timestamp'})
+        frame = frame.drop_duplicates(subset=['timestamp']).sort_values('timestamp')
+        if 'volume' not in frame.columns:
+            frame = frame.assign(volume=0.0)
+        return {col: frame[col].to_numpy(dtype=np.int64 if col == 'timestamp' else np.float64)
+                for col in ('timestamp', 'open', 'close', 'min', 'max', 'volume')}
+
+    # --- Reloj, latencia y fallas ---
+
+    def now(self):
+        """Instante simulado: avanza `speed` segundos por cada segundo real."""
+        return self._sim_start + (time.time() - self._real_start) * self.speed
+
+    def _call(self, name, func, *args):
+        start = time.perf_counter()
+        try:
+            mean, jitter = self.latency.get(name, self.latency.get('default', (0.0, 0.0)))
+            delay = max(0.0, mean + self.rng.uniform(-jitter, jitter))
+            if delay:
+                time.sleep(delay)
+            if self.rng.random() < self.faults.get(name, 0.0):
+                self.errors[name] += 1
+                raise SimulatedFault(f"Falla simulada en {name}")
+            return func(*args)
+        finally:
+            with self._lock:
+                self.timings[name].append(time.perf_counter() - start)
+
+    def _series(self, asset):
+        series = self.series.get(asset)
+        if series is not None:
+            return series, 0
+        # Activos sin serie propia: misma historia desplazada unas velas
+        offset = self._asset_offsets.setdefault(asset, len(self._asset_offsets) * 7)
+        return self.default_series, offset
+
+    def _candle_at(self, asset, sim_time, partial=True):
+        series, offset = self._series(asset)
+        ts = series['timestamp']
+        j = min(max(int(np.searchsorted(ts, sim_time, side='right')) - 1, 0), len(ts) - 1)
+        i = min(j + offset, len(ts) - 1)
+        start = int(ts[j])
+        candle = {
+            'id': i, 'from': start, 'to': start + self.candle_size, 'at': int(sim_time * 1e9),
+            'open': series['open'][i], 'close': series['close'][i],
+            'min': series['min'][i], 'max': series['max'][i], 'volume': series['volume'][i],
+        }
+        progress = (sim_time - start) / self.candle_size
+        if partial and 0 <= progress < 1:
+            # Vela en curso: el cierre avanza hacia el cierre final de la vela guardada
+            candle['close'] = candle['open'] + (candle['close'] - candle['open']) * progress
+        return candle
+
+    # --- Conexión y cuenta ---
+
+    def connect(self):
+        def _connect():
+            self.connected = True
+            return True, None
+        return self._call('connect', _connect)
+
+    def check_connect(self):
+        return self.connected
+
+    def change_balance(self, balance_type):
+        return self._call('change_balance', lambda: None)
+
+    def get_balance(self):
+        return self._call('get_balance', lambda: self.balance)
+
+    # --- Velas ---
+
+    def get_candles(self, asset, size, count, end_time=None):
+        def _get():
+            end = min(end_time if end_time is not None else self.now(), self.now())
+            series, _ = self._series(asset)
+            ts = series['timestamp']
+            last = int(np.searchsorted(ts, end - size, side='right'))
+            first = max(0, last - count)
+            return [self._candle_at(asset, ts[i], partial=False) for i in range(first, last)]
+        return self._call('get_candles', _get)
+
+    def get_digital_candles(self, asset, size, count):
+        return self.get_candles(asset, size, count)
+
+    def get_otc_candles(self, asset, size, count):
+        return self.get_candles(asset, size, count)
+
+    def start_candles_stream(self, asset, size, maxdict):
+        def _start():
+            self._streams[(asset, size)] = maxdict
+        return self._call('start_candles_stream', _start)
+
+    def stop_candles_stream(self, asset, size):
+        self._streams.pop((asset, size), None)
+
+    def get_realtime_candles(self, asset, size):
+        def _get():
+            maxdict = self._streams.get((asset, size))
+            if maxdict is None:
+                return {}
+            now = self.now()
+            candles = {}
+            for k in range(maxdict - 1, -1, -1):
+                candle = self._candle_at(asset, now - k * size, partial=(k == 0))
+                candles[candle['from']] = candle
+            return candles
+        return self._call('get_realtime_candles', _get)
+
+    # --- Órdenes ---
+
+    def _open_order(self, name, asset, amount, direction, duration):
+        if self.rng.random() < self.faults.get(f"{name}_reject", 0.0):
+            self.errors[f"{name}_reject"] += 1
+            return False, "Orden rechazada (simulada)"
+        with self._lock:
+            if amount > self.balance:
+                return False, "Saldo insuficiente"
+            order_id = next(self._order_ids)
+            now = self.now()
+            self._orders[order_id] = {
+                'asset': asset, 'amount': float(amount), 'direction': direction.lower(),
+                'open_price': self._candle_at(asset, now)['close'], 'expires': now + duration,
+                'profit': None,
+            }
+            self.balance -= amount
+        return True, order_id
+
+    def buy(self, amount, asset, direction, expiration):
+        # En la API binaria la expiración se expresa en minutos
+        return self._call('buy', self._open_order, 'buy', asset, amount, direction, expiration * 60)
+
+    def buy_digital_option(self, asset, amount, direction, duration):
+        # duration en segundos, igual que en Trader
+        return self._call('buy_digital_option', self._open_order, 'buy_digital_option',
+                          asset, amount, direction, duration)
+
+    def _resolve(self, order_id):
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order['profit'] is not None:
+                return None if order is None else order['profit']
+            if self.now() < order['expires']:
+                return None
+            close = self._candle_at(order['asset'], order['expires'])['close']
+            moved_up = close > order['open_price']
+            won = moved_up if order['direction'] == 'call' else close < order['open_price']
+            order['profit'] = order['amount'] * self.payout if won else -order['amount']
+            if won:
+                self.balance += order['amount'] + order['profit']
+            return order['profit']
+
+    def check_win_v2(self, order_id, polling_time=None):
+        """Profit de la orden binaria cuando expira; None mientras siga abierta."""
+        return self._call('check_win_v2', self._resolve, order_id)
+
+    def check_win_digital_v2(self, order_id):
+        def _check():
+            profit = self._resolve(order_id)
+            return (profit is not None), profit
+        return self._call('check_win_digital_v2', _check)
+
+    # --- Métricas ---
+
+    def stats(self):
+        """Resumen por método: llamadas, errores y latencias (ms) media, p50, p95 y máxima."""
+        with self._lock:
+            timings = {name: np.array(values) * 1000 for name, values in self.timings.items()}
+        report = {}
+        for name, values in sorted(timings.items()):
+            report[name] = {
+                'calls': len(values), 'errors': self.errors.get(name, 0),
+                'mean_ms': float(values.mean()), 'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)), 'max_ms': float(values.max()),
+            }
+        return report
+
+    def reset_stats(self):
+        with self._lock:
+            self.timings.clear()
+            self.errors.clear()
+
+def load_candles(path):
+    """Carga velas desde CSV o desde el archivo comprimido (.crpa) para la reproducción."""
+    if path.endswith(".crpa"):
+        from data.archive import DeltaArchive
+        return DeltaArchive(path).read_frame()
+    return pd.read_csv(path)
@@ -0,0 +1,222 @@
+import os
+import copy
+import time
+import argparse
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from config.config import Config
+from data.candle import Candle, candles_to_frame, frame_to_candles
+from data.data_collector import DataCollector
+from analysis.strategy_analyzer import StrategyAnalyzer, DEFAULT_DECISION_PARAMS
+from trading.trader import Trader
+from trading.scheduler import CycleScheduler
+from trading.trade_journal import TradeJournal
+from trading.cycle_executor import CycleExecutor
+from trading.decision_cycle import DecisionCycle
+from risk.risk_engine import RiskEngine
+from simulation.fake_iq_option import FakeIQOption, load_candles
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+def _burst_listener(collector, scheduler, burst):
+    """
+    Ráfaga de ticks: cada vela del stream llega `burst` veces seguidas con el cierre
+    desplazándose dentro del rango de la vela, como en momentos de alta volatilidad.
+    """
+    def listener(candle):
+        for k in range(1, burst):
+            close = candle.min + (candle.max - candle.min) * k / burst
+            tick = Candle(candle.timestamp, candle.open, close, candle.min, candle.max, candle.volume)
+            collector.collect_data(tick)
+            scheduler.notify_tick(tick)
+    return listener
+
+class AssetCycle:
+    """
+    Ciclo de decisión de un activo armado con los mismos componentes que main.py:
+    DataCollector (stream del simulador) -> CycleScheduler -> DecisionCycle
+    (CycleExecutor, consolidación, Trader/RiskEngine y TradeJournal). Las latencias
+    se miden con el reloj simulado y se informan en segundos reales.
+    """
+
+    def __init__(self, api, config, asset, directory, risk, journal, ml_model=None,
+                 params=None, history=300, burst=0, stop=None):
+        self.api = api
+        self.asset = asset
+        self.config = copy.copy(config)
+        self.config.data_assets = asset
+        self.config.data_order = asset
+        self.config.csv_path = os.path.join(directory, f"{asset}.csv")
+        self.config.archive_path = None
+        self.config.tick_archive_path = None
+        self.config.result_poll_interval = config.result_poll_interval / api.speed
+        self.params = dict(DEFAULT_DECISION_PARAMS, **(params or {}))
+        self.collector = DataCollector(self.config, api=api)
+        self.scheduler = CycleScheduler.from_config(self.config, clock=api.now)
+        self.collector.add_listener(self.scheduler.notify_tick)
+        if burst > 1:
+            self.collector.add_listener(_burst_listener(self.collector, self.scheduler, burst))
+        self.executor = CycleExecutor.from_config(self.config, ml_model)
+        self.stop_event = stop or threading.Event()
+        # Igual que main.py, pero la espera de la expiración corre en tiempo simulado
+        self.decision_cycle = DecisionCycle(self.config, self.executor,
+                                            StrategyAnalyzer(ml_model, self.params["weights"]),
+                                            self.scheduler, Trader(self.config, api, risk), journal, self.params,
+                                            wait=lambda seconds: self.stop_event.wait(seconds / api.speed),
+                                            time_scale=api.speed)
+        self.min_rows = ml_model.sequence_length if ml_model is not None else 30
+        self.history = history
+        self.stats = {"cycles": 0, "skipped": 0, "trades": 0, "errors": 0, "cycle_ms": [], "latencies": []}
+
+    def prepare(self):
+        """Histórico inicial en el CSV del activo y marcos mayores reconstruidos, como en main.py."""
+        history = pd.DataFrame(self.api.get_candles(self.asset, self.config.candle_size, self.history))
+        history = candles_to_frame(frame_to_candles(history))
+        history.to_csv(self.config.csv_path, index=False)
+        self.collector.timeframes.backfill(history)
+        self.collector.start_realtime()
+
+    def run(self):
+        cycle_start = self.api.now()
+        while not self.stop_event.is_set():
+            bar_close = self.scheduler.wait_next()
+            if self.stop_event.is_set():
+                break
+            woke = time.perf_counter()
+            try:
+                cycle_start = self._cycle(bar_close, cycle_start, woke)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error en el ciclo de {self.asset}: {e}")
+
+    def _cycle(self, bar_close, cycle_start, woke):
+        data = self.collector.realtime_frame(bar_close if self.scheduler.mode == "close" else None)
+        if len(data) < self.min_rows:
+            return cycle_start
+        elapsed = self.api.now() - cycle_start
+        if elapsed < self.params["min_analysis_period"]:
+            return cycle_start
+        decision = self.decision_cycle.decide(data, elapsed, bar_close)
+        if decision is None:
+            self.stats["skipped"] += 1
+            return cycle_start
+        self.stats["cycle_ms"].append((time.perf_counter() - woke) * 1000)
+        self.stats["latencies"].append(decision["latency"])
+        self.stats["cycles"] += 1
+
+        if decision["actionable"]:
+            if self.decision_cycle.execute(decision) is not None:
+                self.stats["trades"] += 1
+            return self.api.now()
+        return cycle_start
+
+    def stop(self):
+        self.scheduler.wake()
+        self.collector.stop()
+        self.executor.shutdown()
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {"p50": None, "p95": None, "max": None}
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "max": float(values.max())}
+
+def run_load(api, config, assets, duration, ml_model=None, params=None, burst=0, journal_path=None):
+    """
+    Ejecuta el ciclo completo de main.py para cada activo en paralelo durante `duration`
+    segundos reales y resume métricas. Motor de riesgo y diario son únicos para todos
+    los activos, igual que el modelo, para medir la contención real.
+    """
+    directory = tempfile.mkdtemp(prefix="load-test-")
+    journal = TradeJournal(journal_path or os.path.join(directory, "journal.db"))
+    # Un único motor de riesgo: los límites de cartera aplican a todos los activos a la vez
+    risk = RiskEngine.from_config(config, api)
+    risk.add_listener(journal.record_settlement)
+    risk.start()
+    stop = threading.Event()
+    cycles = [AssetCycle(api, config, asset, directory, risk, journal, ml_model, params, burst=burst, stop=stop)
+              for asset in assets]
+    threads = []
+    for cycle in cycles:
+        try:
+            cycle.prepare()
+        except Exception as e:
+            cycle.stats["errors"] += 1
+            logger.error(f"❌ No se pudo preparar {cycle.asset}: {e}")
+            continue
+        threads.append(threading.Thread(target=cycle.run, daemon=True))
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for cycle in cycles:
+        cycle.stop()
+    for thread in threads:
+        thread.join(timeout=10)
+    risk.stop()
+    journal.close()
+
+    stats = [c.stats for c in cycles]
+    summary = {
+        "assets": len(assets),
+        "cycles": sum(s["cycles"] for s in stats),
+        "skipped": sum(s["skipped"] for s in stats),
+        "trades": sum(s["trades"] for s in stats),
+        "loop_errors": sum(s["errors"] for s in stats),
+        "cycle_ms": _percentiles([v for s in stats for v in s["cycle_ms"]]),
+        "bar_close_to_decision_s": _percentiles([v for s in stats for v in s["latencies"]]),
+        "late_tasks": {name: sum(c.executor.late.get(name, 0) for c in cycles)
+                       for name in {n for c in cycles for n in c.executor.late}},
+        "busy_tasks": {name: sum(c.executor.busy.get(name, 0) for c in cycles)
+                       for name in {n for c in cycles for n in c.executor.busy}},
+        "api": api.stats(),
+        "balance": api.balance,
+        "risk": {key: value for key, value in risk.snapshot().items() if key != "stakes"},
+        "journal": journal.path,
+    }
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga offline del ciclo de main.py contra el simulador de IQ Option")
+    parser.add_argument("--source", help="CSV o .crpa con velas a reproducir (por defecto el CSV configurado)")
+    parser.add_argument("--assets", type=int, default=50)
+    parser.add_argument("--speed", type=float, default=60.0, help="Segundos simulados por segundo real")
+    parser.add_argument("--duration", type=float, default=60.0, help="Duración en segundos reales")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia media por llamada (s)")
+    parser.add_argument("--order-latency", type=float, default=0.0, help="Latencia media de confirmación de órdenes (s)")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Probabilidad de falla por llamada")
+    parser.add_argument("--schedule", choices=("close", "tick"), help="Modo del CycleScheduler (por defecto el configurado)")
+    parser.add_argument("--burst", type=int, default=0, help="Ticks por vela del stream (ráfagas; implica modo tick)")
+    parser.add_argument("--ml", action="store_true", help="Incluir la validación ML con el bundle guardado")
+    parser.add_argument("--journal", help="SQLite del diario (por defecto uno temporal)")
+    parser.add_argument("--no-trade", action="store_true")
+    args = parser.parse_args()
+
+    config = Config()
+    config.schedule_mode = args.schedule or ("tick" if args.burst > 1 else config.schedule_mode)
+    latency = {"default": (args.latency, args.latency / 2)}
+    if args.order_latency:
+        latency["buy_digital_option"] = (args.order_latency, args.order_latency / 2)
+    faults = {name: args.fault_rate for name in ("get_candles", "get_realtime_candles", "buy_digital_option", "get_balance")}
+    api = FakeIQOption(load_candles(args.source or config.csv_path), speed=args.speed,
+                       latency=latency, faults=faults, seed=42)
+    api.connect()
+    ml_model = None
+    if args.ml:
+        from analysis.ml_model import MLModel
+        ml_model = MLModel(config)
+        if not ml_model.load():
+            raise SystemExit("❌ No hay un bundle del modelo válido para la validación ML")
+    # Sin operar: umbral inalcanzable, el resto del ciclo se ejecuta igual
+    params = {"min_confidence": float("inf")} if args.no_trade else None
+    summary = run_load(api, config, [f"ASSET{i:02d}-OTC" for i in range(args.assets)],
+                            args.duration, ml_model, params, args.burst, args.journal)
+    for key, value in summary.items():
+        if key != "api":
+            print(f"{key}: {value}")
+    for name, stat in summary["api"].items():
+        print(f"{name}: {stat}")
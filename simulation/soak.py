@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from config.config import Config
+from data.candle import Candle, candles_to_frame
+from data.data_collector import DataCollector
+from analysis.strategy_analyzer import StrategyAnalyzer
+from strategies.strategy_signals import get_all_signals, enabled_strategies
+from strategies import candle_patterns
+from simulation.fake_iq_option import FakeIQOption
+from utils.memory import MemoryManager, MB
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+def synthetic_candles(count, start=1_600_000_000, candle_size=60, seed=7, chunk=100_000):
+    """Genera velas sintéticas (paseo aleatorio) por tramos, sin materializar todo el histórico."""
+    rng = np.random.default_rng(seed)
+    price = 1.1
+    for lo in range(0, count, chunk):
+        n = min(chunk, count - lo)
+        close = price + np.cumsum(rng.normal(0, 2e-4, n))
+        open_ = np.concatenate([[price], close[:-1]])
+        spread = np.abs(rng.normal(0, 1e-4, n))
+        volume = rng.integers(1, 500, n)
+        price = float(close[-1])
+        for i in range(n):
+            yield Candle(start + (lo + i) * candle_size, open_[i], close[i],
+                         min(open_[i], close[i]) - spread[i], max(open_[i], close[i]) + spread[i], volume[i])
+
+def soak_config(directory, candle_budget_mb, feature_budget_mb):
+    config = Config()
+    config.csv_path = os.path.join(directory, "soak.csv")
+    config.archive_path = os.path.join(directory, "soak.crpa")
+    config.tick_archive_path = None
+    config.archive_ticks = False
+    # Con la estrategia de patrones, así la caché del escáner cuenta en el presupuesto
+    config.use_candle_pattern_strategy = True
+    config.memory_budgets = dict(config.memory_budgets, candle_buffer=candle_budget_mb * MB,
+                                 feature_cache=feature_budget_mb * MB)
+    return config
+
+def run_soak(candles=2_000_000, window=300, analyze_every=60, check_every=10_000, samples=20,
+             warmup=0.1, max_growth_mb=64.0, candle_budget_mb=1.0, feature_budget_mb=4.0,
+             ml=False, trace=False):
+    """
+    Conduce el camino en vivo (collect_data -> volcado/archivo -> marcos mayores ->
+    estrategias con patrones de velas -> consolidación, y opcionalmente ML) con
+    millones de velas sintéticas bajo el MemoryManager, y verifica que la memoria
+    quede acotada: el RSS no crece más de max_growth_mb después del calentamiento y
+    ningún componente supera su presupuesto más el margen de un intervalo de control.
+    Devuelve (ok, muestras, errores).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        config = soak_config(directory, candle_budget_mb, feature_budget_mb)
+        seed_history = candles_to_frame(list(synthetic_candles(2 * window, start=1_500_000_000)))
+        collector = DataCollector(config, api=FakeIQOption(seed_history))
+        analyzer = StrategyAnalyzer(None)
+        ml_model = None
+        if ml:
+            from analysis.ml_model import MLModel
+            ml_model = MLModel(config)
+            ml_model.load()
+
+        memory = MemoryManager(config.memory_budgets, trace=trace)
+        memory.register("candle_buffer", collector.memory_bytes, collector.request_flush)
+        memory.register("timeframes", collector.timeframes.memory_bytes)
+        memory.register("feature_cache", candle_patterns.scanner.memory_bytes, candle_patterns.scanner.clear)
+        if ml_model is not None:
+            memory.register("model", ml_model.memory_bytes)
+
+        sample_every = max(1, candles // samples)
+        warmup_at = int(candles * warmup)
+        warm_rss = None
+        errors = []
+        started = time.perf_counter()
+        for n, candle in enumerate(synthetic_candles(candles, candle_size=config.candle_size), 1):
+            collector.collect_data(candle)
+            if n % analyze_every == 0:
+                data = collector.timeframes.add_columns(candles_to_frame(collector.buffer[-window:]))
+                columns = list(data.columns)
+                signals = get_all_signals(data, strategies=enabled_strategies(config))
+                analyzer.consolidate_signals(signals, data)
+                if ml_model is not None:
+                    ml_model.predict(data)
+                if list(data.columns) != columns:
+                    errors.append(f"Las estrategias modificaron el DataFrame del ciclo: {set(data.columns) - set(columns)}")
+            if n % check_every == 0:
+                memory.enforce()
+            if n % sample_every == 0:
+                entry = memory.sample()
+                if warm_rss is None and n >= warmup_at:
+                    warm_rss = entry["rss_mb"]
+                for name, size in entry["components_mb"].items():
+                    budget = memory.components[name].budget
+                    # Margen: lo que puede crecer entre dos controles
+                    if budget and size * MB > budget * 1.5 + check_every * 200:
+                        errors.append(f"{name} supera su presupuesto: {size:.2f} MB")
+        final = memory.sample()
+        memory.stop()
+        growth = final["rss_mb"] - (warm_rss if warm_rss is not None else final["rss_mb"])
+        if growth > max_growth_mb:
+            errors.append(f"El RSS creció {growth:.1f} MB tras el calentamiento (máximo {max_growth_mb} MB)")
+        logger.info("🏁 Soak: %d velas en %.1f seg | RSS final %.1f MB | crecimiento %.1f MB | archivadas %d",
+                    candles, time.perf_counter() - started, final["rss_mb"], growth,
+                    collector.storage.archive.info()["rows"])
+        return not errors, memory.history, errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de resistencia de memoria con velas sintéticas")
+    parser.add_argument("--candles", type=int, default=2_000_000)
+    parser.add_argument("--analyze-every", type=int, default=60, help="Velas entre ciclos de estrategias")
+    parser.add_argument("--max-growth-mb", type=float, default=64.0)
+    parser.add_argument("--ml", action="store_true", help="Incluir la predicción del modelo guardado")
+    parser.add_argument("--trace", action="store_true", help="Activar tracemalloc (más lento)")
+    args = parser.parse_args()
+
+    ok, history, errors = run_soak(args.candles, analyze_every=args.analyze_every,
+                                   max_growth_mb=args.max_growth_mb, ml=args.ml, trace=args.trace)
+    print(pd.DataFrame([{k: v for k, v in h.items() if k not in ("top_growth", "ts")} for h in history]).to_string())
+    for error in errors:
+        print(f"❌ {error}")
+    print("✅ Memoria acotada" if ok else "❌ Memoria no acotada")
+    sys.exit(0 if ok else 1)
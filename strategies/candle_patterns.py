@@ -0,0 +1,23 @@
+from config.config import Config
+from analysis.pattern_scanner import PatternScanner
+
+# Patrones configurados (CANDLE_PATTERNS): funciones CDL* de TA-Lib y reglas propias.
+# El escáner guarda en caché los puntajes de las velas cerradas: cada ciclo solo
+# evalúa las velas nuevas.
+scanner = PatternScanner(Config().candle_patterns)
+
+# Confianza según el puntaje neto de la última vela (+1/+2 por patrón alcista,
+# -1/-2 por bajista): base más un paso por punto, con tope
+BASE_CONFIDENCE = 0.5
+CONFIDENCE_STEP = 0.1
+MAX_CONFIDENCE = 0.9
+
+def get_candle_pattern_signal(data):
+    try:
+        net = int(scanner.scan(data).score[-1])
+    except Exception:
+        return "neutral", 0.0
+    if net == 0:
+        return "neutral", 0.0
+    confidence = min(MAX_CONFIDENCE, BASE_CONFIDENCE + CONFIDENCE_STEP * abs(net))
+    return ("call" if net > 0 else "put"), confidence
@@ -0,0 +1,29 @@
+class Signal:
+    """Señal compacta de una estrategia: nombre, dirección y confianza."""
+    __slots__ = ('strategy', 'signal', 'confidence')
+
+    def __init__(self, strategy, signal, confidence=0.0):
+        self.strategy = strategy
+        self.signal = signal
+        self.confidence = float(confidence or 0.0)
+
+    @classmethod
+    def from_dict(cls, raw):
+        return cls(raw.get('strategy', 'unknown'), raw.get('signal'), raw.get('confidence', 0.0))
+
+    @classmethod
+    def coerce(cls, value):
+        return value if isinstance(value, cls) else cls.from_dict(value)
+
+    def get(self, key, default=None):
+        """Acceso estilo diccionario para el código que aún espera dicts."""
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self):
+        return {'strategy': self.strategy, 'signal': self.signal, 'confidence': self.confidence}
+
+    def __eq__(self, other):
+        return isinstance(other, Signal) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Signal({self.strategy}: {self.signal} @ {self.confidence:.2f})"
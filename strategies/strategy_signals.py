@@ -1,21 +1,36 @@
 from strategies.price_action import get_price_action_signal
 from strategies.momentum import get_momentum_signal
 from strategies.news_impact import get_news_signal
+from strategies.candle_patterns import get_candle_pattern_signal
+from strategies.signal import Signal
 
-def get_all_signals(data, news=None):
+# Evaluadores independientes: nombre -> función (data, news) -> (señal, confianza).
+# El CycleExecutor los ejecuta en paralelo; get_all_signals, en secuencia.
+STRATEGIES = {
+    'price_action': lambda data, news: get_price_action_signal(data),
+    'momentum': lambda data, news: get_momentum_signal(data),
+    'news_impact': lambda data, news: get_news_signal(news),
+    'candle_patterns': lambda data, news: get_candle_pattern_signal(data),
+}
+
+# Estrategias que votan por defecto. candle_patterns se suma solo con
+# USE_CANDLE_PATTERN_STRATEGY=1: un voto más cambia la consolidación y los
+# parámetros de decisión barridos sin él dejan de ser válidos.
+DEFAULT_STRATEGIES = ['price_action', 'momentum', 'news_impact']
+
+def enabled_strategies(config):
+    names = list(DEFAULT_STRATEGIES)
+    if config.use_candle_pattern_strategy:
+        names.append('candle_patterns')
+    return names
+
+def evaluate_strategy(name, data, news=None):
+    signal, confidence = STRATEGIES[name](data, news)
+    return Signal(name, signal, confidence)
+
+def get_all_signals(data, news=None, strategies=None):
     """
-    Obtiene todas las señales combinadas a partir de las estrategias implementadas.
+    Obtiene todas las señales combinadas a partir de las estrategias habilitadas
+    (por defecto, DEFAULT_STRATEGIES).
     """
-    signals = []
-    pa_signal, pa_conf = get_price_action_signal(data)
-    signals.append({'strategy': 'price_action', 'signal': pa_signal, 'confidence': pa_conf})
-    
-    m_signal, m_conf = get_momentum_signal(data)
-    signals.append({'strategy': 'momentum', 'signal': m_signal, 'confidence': m_conf})
-    
-    n_signal, n_conf = get_news_signal(news)
-    signals.append({'strategy': 'news_impact', 'signal': n_signal, 'confidence': n_conf})
-    
-    # Se puede agregar más estrategias, por ejemplo, candle_patterns, si se desea.
-    
-    return signals
\ No newline at end of file
+    return [evaluate_strategy(name, data, news) for name in (strategies or DEFAULT_STRATEGIES)]
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from data.archive import DeltaArchive
+
+def _candles(start, count):
+    ts = 1_700_000_000 + 60 * np.arange(start, start + count)
+    close = np.round(1.1 + np.sin(np.arange(start, start + count) / 50) * 0.01, 6)
+    return pd.DataFrame({"timestamp": ts, "open": close, "close": close, "min": close - 0.0001,
+                         "max": close + 0.0001, "volume": 1.0})
+
+def test_interrupted_append_keeps_previous_state(tmp_path):
+    path = str(tmp_path / "history.crpa")
+    archive = DeltaArchive(path, block_size=64)
+    archive.append(_candles(0, 150))
+    committed = os.path.getsize(path)
+    expected = archive.read()
+
+    archive.append(_candles(150, 100))
+    complete = os.path.getsize(path)
+    assert complete > committed
+
+    # Un corte en cualquier punto del append deja el archivo como estaba antes
+    for cut in range(committed, complete, 7):
+        broken = str(tmp_path / f"broken_{cut}.crpa")
+        shutil.copyfile(path, broken)
+        with open(broken, "r+b") as f:
+            f.truncate(cut)
+        reopened = DeltaArchive(broken)
+        assert np.array_equal(reopened.read(), expected)
+        # Y sigue aceptando escrituras
+        assert reopened.append(_candles(150, 10)) == 10
+        assert len(reopened) == 160
+
+def test_compact_keeps_rows(tmp_path):
+    path = str(tmp_path / "history.crpa")
+    archive = DeltaArchive(path, block_size=64)
+    for start in range(0, 300, 10):
+        archive.append(_candles(start, 10))
+    before = archive.read()
+    archive.compact()
+    assert np.array_equal(DeltaArchive(path).read(), before)
@@ -0,0 +1,16 @@
+from data.candle import Candle
+from data.data_storage import DataStorage
+import data.data_storage as data_storage
+
+def test_save_candles_merges_only_the_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_storage, "CSV_TAIL_CHUNK", 16)
+    storage = DataStorage(str(tmp_path / "candles.csv"))
+    storage.save_candles([Candle(60 * i, 1.0, 1.0, 0.5, 1.5, 1) for i in range(100)])
+    prefix = open(storage.csv_path).read().splitlines()[:90]
+
+    # La vela en curso se vuelve a guardar actualizada junto con las nuevas
+    storage.save_candles([Candle(60 * i, 2.0, 2.0, 0.5, 2.5, 2) for i in (105, 99, 100)])
+    candles = storage.load_candles()
+    assert [c.timestamp for c in candles] == [60 * i for i in range(101)] + [60 * 105]
+    assert candles[99].close == 2.0 and candles[98].close == 1.0
+    assert open(storage.csv_path).read().splitlines()[:90] == prefix
@@ -0,0 +1,66 @@
+from risk.risk_engine import RiskEngine
+
+class StubBalanceAPI:
+    """API mínima: saldo del broker que solo descuenta órdenes confirmadas."""
+
+    def __init__(self, balance):
+        self.balance = balance
+
+    def get_balance(self):
+        return self.balance
+
+    def check_win_digital_v2(self, order_id):
+        return False, None
+
+def test_reconcile_keeps_unconfirmed_reservations():
+    api = StubBalanceAPI(10000.0)
+    engine = RiskEngine(api)
+    reservation, amount = engine.reserve("EURUSD-op")
+    assert amount == 500.0
+
+    engine.reconcile()
+    assert engine.balance == 9500.0
+    assert engine.equity() == 10000.0
+
+    engine.release(reservation)
+    assert engine.balance == 10000.0
+    assert engine.equity() == 10000.0
+
+def test_reconcile_trusts_broker_for_confirmed_orders():
+    api = StubBalanceAPI(10000.0)
+    engine = RiskEngine(api)
+    reservation, amount = engine.reserve("EURUSD-op")
+    engine.confirm(reservation, 1, 60)
+    api.balance -= amount  # El broker ya debitó la orden
+
+    engine.reconcile()
+    assert engine.balance == 9500.0
+    assert engine.equity() == 10000.0
+
+def test_reconcile_after_expiry_settles_before_adopting_remote():
+    api = StubBalanceAPI(10000.0)
+    engine = RiskEngine(api)
+    reservation, amount = engine.reserve("EURUSD-op")
+    engine.confirm(reservation, 1, 0)
+    # El broker ya resolvió la orden ganadora y acreditó monto + pago
+    api.balance += 0.85 * amount
+    api.check_win_digital_v2 = lambda order_id: (True, 0.85 * amount)
+
+    engine.reconcile()
+    assert engine.balance == api.balance
+    assert engine.exposure() == 0
+    engine.settle(1, 0.85 * amount)  # El ciclo principal liquida tarde: no cambia nada
+    assert engine.balance == api.balance
+
+def test_late_settle_does_not_credit_a_reconciled_payout():
+    api = StubBalanceAPI(10000.0)
+    engine = RiskEngine(api)
+    reservation, amount = engine.reserve("EURUSD-op")
+    engine.confirm(reservation, 1, 0)
+    # El saldo remoto ya incluye el pago, pero la consulta del resultado aún no lo informa
+    api.balance += 0.85 * amount
+
+    engine.reconcile()
+    engine.settle(1, 0.85 * amount)
+    assert engine.balance == api.balance
+    assert engine.realized_pnl == 0.85 * amount
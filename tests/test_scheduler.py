@@ -0,0 +1,31 @@
+import time
+import threading
+from data.candle import Candle
+from trading.scheduler import CycleScheduler
+
+def _ticks(scheduler, count, interval):
+    for i in range(count):
+        scheduler.notify_tick(Candle(60, 1.0, 1.0 + i * 1e-5, 0.9, 1.1, i))
+        time.sleep(interval)
+
+def test_tick_debounce_waits_for_a_quiet_period():
+    scheduler = CycleScheduler(mode="tick", debounce=0.2, max_debounce=5.0)
+    # Ráfaga de ~0.8 seg con ticks cada 0.05 seg: dispara recién 0.2 seg después del último
+    burst = threading.Thread(target=_ticks, args=(scheduler, 16, 0.05))
+    started = time.monotonic()
+    burst.start()
+    scheduler.wait_next()
+    elapsed = time.monotonic() - started
+    burst.join()
+    assert elapsed >= 0.8 + 0.2 - 0.05
+    assert not scheduler._event.is_set()
+
+def test_tick_debounce_is_capped_for_continuous_ticks():
+    scheduler = CycleScheduler(mode="tick", debounce=0.2, max_debounce=0.5)
+    burst = threading.Thread(target=_ticks, args=(scheduler, 40, 0.05))
+    started = time.monotonic()
+    burst.start()
+    scheduler.wait_next()
+    elapsed = time.monotonic() - started
+    burst.join()
+    assert elapsed < 1.2
@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("talib")
+pytest.importorskip("iqoptionapi")
+from simulation.soak import run_soak
+
+def test_short_soak_stays_within_memory_budgets():
+    ok, history, errors = run_soak(candles=20_000, window=300, analyze_every=500, check_every=2_000,
+                                   samples=10, warmup=0.2, max_growth_mb=64.0, candle_budget_mb=1.0,
+                                   feature_budget_mb=4.0)
+    assert ok, errors
+    assert len(history) >= 10
+    final = history[-1]["components_mb"]
+    assert final["candle_buffer"] <= 1.0 * 1.5
+    assert final["feature_cache"] <= 4.0 * 1.5
+    # El RSS tras el calentamiento no sigue creciendo con las velas procesadas
+    assert history[-1]["rss_mb"] - history[2]["rss_mb"] <= 64.0
@@ -0,0 +1,95 @@
+import time
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from strategies.strategy_signals import DEFAULT_STRATEGIES, enabled_strategies, evaluate_strategy
+
+ML_TASK = "ml_validation"
+
+class CycleExecutor:
+    """
+    Ejecuta en paralelo, dentro de un presupuesto de tiempo por ciclo, los
+    evaluadores de estrategias y la validación del modelo (TA-Lib y TensorFlow
+    liberan el GIL). Lo que no termina antes del plazo se descarta para este
+    ciclo: la consolidación usa solo lo que llegó a tiempo. Una tarea que sigue
+    corriendo desde un ciclo anterior no se vuelve a lanzar hasta que termine,
+    así una estrategia lenta (o la carga del modelo) no acumula hilos.
+    """
+
+    def __init__(self, ml_model=None, budget=2.0, max_workers=4, strategies=None):
+        self.logger = logging.getLogger()
+        self.ml_model = ml_model
+        self.budget = budget
+        self.strategies = list(strategies or DEFAULT_STRATEGIES)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cycle")
+        self._inflight = {}
+        self.late = defaultdict(int)
+        self.busy = defaultdict(int)
+        self.cycles = 0
+
+    @classmethod
+    def from_config(cls, config, ml_model=None):
+        return cls(ml_model, config.cycle_budget, config.cycle_workers, enabled_strategies(config))
+
+    def _submit(self, name, func, *args):
+        previous = self._inflight.get(name)
+        if previous is not None and not previous.done():
+            self.busy[name] += 1
+            return None
+        future = self.pool.submit(func, *args)
+        self._inflight[name] = future
+        return future
+
+    def run(self, data, news=None, budget=None):
+        """
+        Lanza todas las tareas del ciclo y espera como máximo `budget` segundos.
+        Devuelve {'signals', 'ml_validation', 'late', 'elapsed'}; ml_validation es
+        None si el modelo no respondió a tiempo.
+        """
+        budget = self.budget if budget is None else budget
+        started = time.perf_counter()
+        futures = {}
+        for name in self.strategies:
+            future = self._submit(name, evaluate_strategy, name, data, news)
+            if future is not None:
+                futures[future] = name
+        if self.ml_model is not None:
+            future = self._submit(ML_TASK, self.ml_model.predict, data)
+            if future is not None:
+                futures[future] = ML_TASK
+
+        done, pending = wait(futures, timeout=budget)
+        signals = []
+        ml_validation = None
+        for future in done:
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                self.logger.error(f"❌ Error en la tarea {name}: {e}")
+                continue
+            if name == ML_TASK:
+                ml_validation = result
+            else:
+                signals.append(result)
+        # Orden estable para que la consolidación no dependa de qué hilo terminó antes
+        order = {name: i for i, name in enumerate(self.strategies)}
+        signals.sort(key=lambda s: order.get(s.strategy, len(order)))
+
+        late = sorted(futures[f] for f in pending)
+        for name in late:
+            self.late[name] += 1
+        skipped = [name for name in self.strategies + [ML_TASK] if name not in futures.values()
+                   and (name != ML_TASK or self.ml_model is not None)]
+        if late or skipped:
+            self.logger.warning("⏳ Fuera del plazo de %.2f seg: %s | aún en curso: %s", budget, late, skipped)
+        self.cycles += 1
+        return {"signals": signals, "ml_validation": ml_validation, "late": late + skipped,
+                "elapsed": time.perf_counter() - started}
+
+    def metrics(self):
+        return {"cycles": self.cycles, "late": dict(self.late), "busy": dict(self.busy)}
+
+    def shutdown(self):
+        # Las tareas atrasadas terminan solas; no se espera por ellas
+        self.pool.shutdown(wait=False, cancel_futures=True)
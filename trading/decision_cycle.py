@@ -0,0 +1,83 @@
+import time
+import logging
+
+class DecisionCycle:
+    """
+    Paso de decisión de cada ciclo, compartido por main.py y simulation/run_load.py:
+    estrategias y validación ML en paralelo (CycleExecutor) -> consolidación ->
+    refuerzo ML y confianza extra por tiempo -> diario -> orden y espera del resultado.
+    - params: parámetros de decisión (load_decision_params).
+    - wait: espera en segundos del reloj del scheduler (time.sleep en vivo).
+    - time_scale: segundos de ese reloj por segundo real (el simulador acelera el tiempo).
+    """
+
+    def __init__(self, config, executor, analyzer, scheduler, trader, journal, params,
+                 wait=time.sleep, time_scale=1.0):
+        self.logger = logging.getLogger()
+        self.config = config
+        self.executor = executor
+        self.analyzer = analyzer
+        self.scheduler = scheduler
+        self.trader = trader
+        self.journal = journal
+        self.params = params
+        self.wait = wait
+        self.time_scale = time_scale
+
+    def decide(self, data, elapsed, bar_close):
+        """
+        Evalúa el ciclo y lo registra en el diario. Devuelve None si no hay datos nuevos
+        desde el último ciclo; si no, un dict con la señal consolidada, la confianza
+        efectiva, la latencia cierre de vela -> decisión (seg reales) y si supera el umbral.
+        """
+        # Sin datos nuevos desde el último ciclo no hay nada que reevaluar
+        if not self.scheduler.has_changed(data):
+            return None
+
+        # Fase dinámica: evaluar señales (en paralelo, con plazo) y acumular confianza.
+        cycle = self.executor.run(data, news=None)
+        signals = cycle["signals"]
+        self.logger.info("Señales generadas: %s (%.3f seg)", signals, cycle["elapsed"])
+
+        # Se consolida lo que llegó dentro del plazo; lo atrasado queda fuera de este ciclo
+        consolidated_signal = self.analyzer.consolidate_signals(signals, data)
+        base_confidence = consolidated_signal.get("confidence", 0)
+        direction = consolidated_signal.get("direction")
+        self.logger.info("Señal consolidada preliminar: %s con confianza %.2f", direction, base_confidence)
+
+        ml_validation = cycle["ml_validation"]
+        self.logger.info("Validación ML: %s", ml_validation)
+        if ml_validation == direction:
+            base_confidence += self.params["ml_boost"]
+            self.logger.info("La validación ML coincide. Refuerzo aplicado.")
+
+        extra_time = elapsed - self.params["min_analysis_period"]
+        effective_confidence = base_confidence + extra_time * self.params["extra_confidence_factor"]
+        latency = self.scheduler.record_decision(bar_close) / self.time_scale
+        self.logger.info("⏱️ Latencia cierre de vela -> decisión: %.3f seg | %s | %s", latency,
+                         self.scheduler.metrics(), self.executor.metrics())
+
+        decision_id = self.journal.record_decision(signals, consolidated_signal, base_confidence,
+                                                   effective_confidence, ml_validation,
+                                                   asset=self.config.data_assets, bar_close=bar_close,
+                                                   latency=latency)
+        return {
+            "decision_id": decision_id,
+            "signal": consolidated_signal,
+            "effective_confidence": effective_confidence,
+            "extra_time": extra_time,
+            "latency": latency,
+            "actionable": direction in ("call", "put") and effective_confidence >= self.params["min_confidence"],
+        }
+
+    def execute(self, decision):
+        """Opera la decisión, espera la expiración y consulta el resultado. Devuelve la orden o None."""
+        order = self.trader.trade(decision["signal"])
+        if order is not None:
+            self.journal.record_order(decision["decision_id"], order["order_id"], order["amount"])
+        self.logger.info("Operación ejecutada. Esperando a que finalice...")
+        self.wait(self.config.trade_duration + 5)
+        if order is not None:
+            # El resultado llega al diario desde la liquidación (listener del RiskEngine)
+            self.trader.wait_result(order["order_id"])
+        return order
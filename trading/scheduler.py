@@ -0,0 +1,131 @@
+import time
+import threading
+import logging
+from collections import deque
+
+class CycleScheduler:
+    """
+    Dispara el ciclo de decisión alineado a los eventos del mercado en lugar de
+    un sleep fijo:
+    - modo 'close': una vez por vela, al cerrar (aviso del DataCollector o, como
+      respaldo, el reloj en el límite de la vela más bar_close_grace segundos).
+    - modo 'tick': en cada tick recibido, agrupando ráfagas con un debounce: el ciclo
+      dispara tras `debounce` segundos sin ticks nuevos (como mucho max_debounce
+      segundos después del primero, para que una ráfaga continua no lo frene).
+    También omite ciclos cuyos datos de entrada no cambiaron y mide la latencia
+    entre el cierre de la vela y la decisión. `clock` permite medir contra otro reloj
+    (p. ej. el reloj simulado de FakeIQOption en las pruebas de carga).
+    """
+
+    def __init__(self, candle_size=60, mode="close", debounce=0.5, bar_close_grace=2.0, history=500,
+                 clock=time.time, max_debounce=None):
+        if mode not in ("close", "tick"):
+            raise ValueError(f"Modo de planificación no soportado: {mode}")
+        self.logger = logging.getLogger()
+        self.candle_size = candle_size
+        self.mode = mode
+        self.debounce = debounce
+        self.max_debounce = 5 * debounce if max_debounce is None else max_debounce
+        self.bar_close_grace = bar_close_grace
+        self.clock = clock
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._last_candle_ts = None
+        self._last_bar_close = None
+        self._last_fingerprint = None
+        self._trigger_time = None
+        self._latencies = deque(maxlen=history)
+        self.skipped = 0
+        self.triggered = 0
+
+    @classmethod
+    def from_config(cls, config, clock=time.time):
+        return cls(config.candle_size, config.schedule_mode, config.tick_debounce, config.bar_close_grace,
+                   clock=clock)
+
+    def notify_tick(self, candle):
+        """Callback para el DataCollector: recibe cada vela del stream."""
+        with self._lock:
+            new_bar = self._last_candle_ts is not None and candle.timestamp > self._last_candle_ts
+            self._last_candle_ts = candle.timestamp
+            if new_bar:
+                # La vela nueva abre justo cuando cierra la anterior
+                self._last_bar_close = candle.timestamp
+            if (self.mode == "tick" or new_bar) and self._trigger_time is None:
+                # Primer disparo pendiente: desde aquí se mide la latencia
+                self._trigger_time = self.clock()
+        if self.mode == "tick" or new_bar:
+            self._event.set()
+
+    def _next_boundary(self, now):
+        return (int(now // self.candle_size) + 1) * self.candle_size
+
+    def wait_next(self):
+        """
+        Bloquea hasta el siguiente disparo y devuelve el instante de referencia para
+        la latencia: el cierre de vela en modo 'close' y el tick que disparó en modo
+        'tick'. El evento se limpia recién al consumirlo, así un cierre o tick que
+        llega mientras se procesa el ciclo anterior dispara el siguiente de inmediato.
+        """
+        if self.mode == "tick":
+            # Tope de una vela para que el bucle siga verificando horario y activo
+            self._event.wait(self.candle_size)
+            if self.debounce > 0:
+                # Período de silencio: cada tick dentro de `debounce` reinicia la espera
+                deadline = time.monotonic() + self.max_debounce
+                while True:
+                    self._event.clear()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._event.wait(min(self.debounce, remaining)):
+                        break
+            self._event.clear()
+            with self._lock:
+                trigger, self._trigger_time = self._trigger_time, None
+            self.triggered += 1
+            return trigger or self.clock()
+        boundary = self._next_boundary(self.clock())
+        timeout = max(0.0, boundary + self.bar_close_grace - self.clock())
+        if not self._event.wait(timeout):
+            # Sin aviso del stream: se usa el cierre según el reloj
+            with self._lock:
+                self._last_bar_close = boundary
+        self._event.clear()
+        with self._lock:
+            self._trigger_time = None
+            self.triggered += 1
+            return self._last_bar_close or self._next_boundary(self.clock()) - self.candle_size
+
+    def wake(self):
+        """Despierta un wait_next en curso (p. ej. al detener el bot)."""
+        self._event.set()
+
+    def has_changed(self, data):
+        """True si los datos de entrada difieren de los del último ciclo evaluado."""
+        if data is None or data.empty:
+            return False
+        last = data.iloc[-1]
+        fingerprint = (len(data), last.get('timestamp'), last.get('close'), last.get('volume'))
+        if fingerprint == self._last_fingerprint:
+            self.skipped += 1
+            return False
+        self._last_fingerprint = fingerprint
+        return True
+
+    def record_decision(self, reference):
+        """Registra la latencia disparo (cierre de vela o tick) -> decisión y la devuelve en segundos."""
+        latency = max(0.0, self.clock() - reference)
+        self._latencies.append(latency)
+        return latency
+
+    def metrics(self):
+        latencies = list(self._latencies)
+        if not latencies:
+            return {"cycles": self.triggered, "skipped": self.skipped, "latency_last": None,
+                    "latency_avg": None, "latency_max": None}
+        return {
+            "cycles": self.triggered,
+            "skipped": self.skipped,
+            "latency_last": latencies[-1],
+            "latency_avg": sum(latencies) / len(latencies),
+            "latency_max": max(latencies),
+        }
@@ -0,0 +1,202 @@
+import os
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    bar_close REAL,
+    asset TEXT,
+    direction TEXT,
+    strategy TEXT,
+    base_confidence REAL,
+    effective_confidence REAL,
+    ml_validation TEXT,
+    executed INTEGER NOT NULL DEFAULT 0,
+    order_id TEXT,
+    amount REAL,
+    latency REAL,
+    profit REAL,
+    win INTEGER,
+    resolved_ts REAL
+);
+CREATE TABLE IF NOT EXISTS decision_signals (
+    decision_id TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    signal TEXT,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_ts ON decisions(ts);
+CREATE INDEX IF NOT EXISTS idx_decisions_order ON decisions(order_id);
+CREATE INDEX IF NOT EXISTS idx_signals_strategy ON decision_signals(strategy, decision_id);
+CREATE INDEX IF NOT EXISTS idx_signals_decision ON decision_signals(decision_id);
+"""
+
+_STOP = object()
+
+class TradeJournal:
+    """
+    Diario de operaciones en SQLite. Cada decisión del ciclo principal (señales,
+    confianza, validación ML, orden y resultado) se encola y un hilo escritor la
+    persiste en lotes, de modo que el ciclo nunca espera al disco.
+    """
+
+    def __init__(self, path, batch_size=100, flush_interval=1.0):
+        self.logger = logging.getLogger()
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer_loop, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- Escritura asíncrona ---
+
+    def record_decision(self, signals, consolidated, base_confidence, effective_confidence,
+                        ml_validation, asset=None, bar_close=None, latency=None,
+                        executed=False, order_id=None, amount=None):
+        """Encola una decisión y devuelve su id para asociar luego el resultado."""
+        decision_id = uuid.uuid4().hex
+        row = (decision_id, time.time(), bar_close, asset, consolidated.get("direction"),
+               consolidated.get("strategy"), base_confidence, effective_confidence,
+               None if ml_validation is None else str(ml_validation), int(bool(executed)),
+               None if order_id is None else str(order_id), amount, latency)
+        signal_rows = [(decision_id, s.get("strategy"), s.get("signal"), s.get("confidence", 0.0))
+                       for s in signals]
+        self._queue.put(("decision", row, signal_rows))
+        return decision_id
+
+    def record_order(self, decision_id, order_id, amount):
+        self._queue.put(("order", (None if order_id is None else str(order_id), amount, decision_id)))
+
+    def record_result(self, decision_id, profit):
+        """Registra el resultado de la operación (profit > 0 cuenta como ganada). Sin profit no hay nada que registrar."""
+        if profit is None:
+            return
+        self._queue.put(("result", (profit, int(profit > 0), time.time(), decision_id)))
+
+    def record_settlement(self, order_id, profit):
+        """
+        Registra el resultado por id de orden, tal como lo liquida el RiskEngine (en el
+        ciclo o en la conciliación de fondo). Solo la primera liquidación cuenta.
+        """
+        if profit is None:
+            return
+        self._queue.put(("settlement", (profit, int(profit > 0), time.time(), str(order_id))))
+
+    def _write_batch(self, conn, batch):
+        with conn:
+            for item in batch:
+                kind = item[0]
+                if kind == "decision":
+                    conn.execute("INSERT OR REPLACE INTO decisions (id, ts, bar_close, asset, direction, strategy, "
+                                 "base_confidence, effective_confidence, ml_validation, executed, order_id, amount, "
+                                 "latency) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", item[1])
+                    conn.executemany("INSERT INTO decision_signals (decision_id, strategy, signal, confidence) "
+                                     "VALUES (?, ?, ?, ?)", item[2])
+                elif kind == "order":
+                    conn.execute("UPDATE decisions SET executed = 1, order_id = ?, amount = ? WHERE id = ?", item[1])
+                elif kind == "result":
+                    conn.execute("UPDATE decisions SET profit = ?, win = ?, resolved_ts = ? WHERE id = ?", item[1])
+                elif kind == "settlement":
+                    conn.execute("UPDATE decisions SET profit = ?, win = ?, resolved_ts = ? "
+                                 "WHERE order_id = ? AND resolved_ts IS NULL", item[1])
+
+    def _writer_loop(self):
+        conn = self._connect()
+        stop = False
+        while not stop:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.time() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write_batch(conn, batch)
+            except Exception as e:
+                self.logger.error(f"❌ Error al escribir en el diario de operaciones: {e}")
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+        conn.close()
+
+    def flush(self):
+        """Bloquea hasta que todo lo encolado esté escrito."""
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    # --- Consultas ---
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def win_rate_by_strategy(self, since=None, until=None):
+        """Tasa de acierto por estrategia: operaciones resueltas en las que la estrategia coincidía con la dirección."""
+        since = 0 if since is None else since
+        until = time.time() if until is None else until
+        return self._query(
+            "SELECT s.strategy AS strategy, COUNT(*) AS trades, SUM(d.win) AS wins, "
+            "AVG(d.win) AS win_rate, SUM(d.profit) AS profit "
+            "FROM decisions d JOIN decision_signals s ON s.decision_id = d.id "
+            "WHERE d.ts BETWEEN ? AND ? AND d.executed = 1 AND d.win IS NOT NULL AND s.signal = d.direction "
+            "GROUP BY s.strategy ORDER BY win_rate DESC",
+            (since, until))
+
+    def latency_over_time(self, bucket_seconds=3600, since=None, until=None):
+        """Latencia media y máxima cierre de vela -> decisión agrupada en ventanas de bucket_seconds."""
+        since = 0 if since is None else since
+        until = time.time() if until is None else until
+        return self._query(
+            "SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, COUNT(*) AS decisions, "
+            "AVG(latency) AS latency_avg, MAX(latency) AS latency_max "
+            "FROM decisions WHERE ts BETWEEN ? AND ? AND latency IS NOT NULL "
+            "GROUP BY bucket ORDER BY bucket",
+            (bucket_seconds, bucket_seconds, since, until))
+
+    def decisions(self, since=None, until=None, executed_only=False):
+        since = 0 if since is None else since
+        until = time.time() if until is None else until
+        sql = "SELECT * FROM decisions WHERE ts BETWEEN ? AND ?"
+        if executed_only:
+            sql += " AND executed = 1"
+        rows = self._query(sql + " ORDER BY ts", (since, until))
+        for row in rows:
+            row["signals"] = self._query(
+                "SELECT strategy, signal, confidence FROM decision_signals WHERE decision_id = ?", (row["id"],))
+        return rows
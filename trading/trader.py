@@ -1,11 +1,14 @@
+import time
 import logging
-from risk.risk_manager import get_trade_size
+from risk.risk_engine import RiskEngine
 
 class Trader:
-    def __init__(self, config, api):
+    def __init__(self, config, api, risk=None):
         self.config = config
         self.api = api
         self.logger = logging.getLogger()
+        # Motor de riesgo compartido (saldo local y límites de cartera); uno propio si no se inyecta
+        self.risk = risk if risk is not None else RiskEngine.from_config(config, api)
 
     def trade(self, consolidated_signal):
         direction = consolidated_signal.get("direction")
@@ -14,15 +17,52 @@ class Trader:
 
         if direction not in ["call", "put"]:
             self.logger.info("Señal inválida. No se ejecuta operación.")
-            return
+            return None
+
+        # Monto precalculado con el saldo local: sin llamadas a la API antes de la orden
+        reservation, trade_amount = self.risk.reserve(self.config.data_order)
+        if reservation is None:
+            self.logger.warning(f"🛡️ Operación bloqueada por el motor de riesgo: {trade_amount}")
+            return None
 
         try:
-            current_balance = self.api.get_balance()
-            self.logger.info(f"Balance actual: {current_balance:.2f} USD")
-            trade_amount = get_trade_size(current_balance, self.config.risk_percentage)
-            duration = 60  # Duración de la operación en segundos
+            duration = self.config.trade_duration  # Duración de la operación en segundos
             # Se actualiza la llamada para la nueva API: buy_digital_option (en lugar de buy_digital_spot)
-            self.api.buy_digital_option(self.config.data_order, trade_amount, direction, duration)
-            self.logger.info(f"💰 Operación ejecutada: {direction.upper()} por {trade_amount:.2f} USD, duración {duration} segundos")
+            check, order_id = self.api.buy_digital_option(self.config.data_order, trade_amount, direction, duration)
+            if not check:
+                self.risk.release(reservation)
+                self.logger.error(f"❌ La orden fue rechazada: {order_id}")
+                return None
+            self.risk.confirm(reservation, order_id, duration)
+            self.logger.info(f"💰 Operación ejecutada: {direction.upper()} por {trade_amount:.2f} USD, duración {duration} segundos, ID: {order_id}")
+            return {"order_id": order_id, "amount": trade_amount, "direction": direction}
         except Exception as e:
+            self.risk.release(reservation)
             self.logger.error(f"❌ Error al ejecutar la operación: {e}")
+            return None
+
+    def check_result(self, order_id):
+        """Devuelve el profit de una orden digital cerrada, o None si aún no se conoce."""
+        try:
+            check, profit = self.api.check_win_digital_v2(order_id)
+            if not check:
+                return None
+            self.risk.settle(order_id, profit)
+            return profit
+        except Exception as e:
+            self.logger.error(f"❌ Error al consultar el resultado de la orden {order_id}: {e}")
+            return None
+
+    def wait_result(self, order_id):
+        """
+        Consulta el resultado hasta config.result_poll_attempts veces. Si sigue sin
+        conocerse devuelve None: el RiskEngine liquida la orden en la conciliación.
+        """
+        for attempt in range(self.config.result_poll_attempts):
+            if attempt:
+                time.sleep(self.config.result_poll_interval)
+            profit = self.check_result(order_id)
+            if profit is not None:
+                return profit
+        self.logger.warning(f"⚠️ Resultado de la orden {order_id} aún desconocido; se registrará al liquidarla")
+        return None
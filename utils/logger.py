@@ -1,9 +1,138 @@
+import os
+import copy
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+_lock = threading.Lock()
+_listener = None
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler que deja el formateo (fecha, nivel, JSON) al hilo del QueueListener.
+    En el hilo que registra solo se fija el texto del mensaje (msg % args) y el de la
+    excepción, porque los argumentos pueden ser objetos que cambian después (DataFrames,
+    listas de señales) y el traceback mantiene vivos los frames.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita los mensajes repetitivos del ciclo principal. Se agrupan por plantilla
+    (record.msg), por eso los mensajes frecuentes deben usar argumentos %s en lugar
+    de f-strings. Cada plantilla deja pasar `burst` mensajes por ventana de `per`
+    segundos; del resto se muestrea uno de cada `sample` (0 = ninguno). Al abrir una
+    nueva ventana, el primer mensaje indica cuántos se suprimieron. WARNING y
+    superiores nunca se limitan.
+    """
+
+    def __init__(self, burst=10, per=60.0, sample=0, max_keys=2000):
+        super().__init__()
+        self.burst = burst
+        self.per = per
+        self.sample = sample
+        self.max_keys = max_keys
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg).__name__)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                if len(self._state) >= self.max_keys:
+                    self._state.clear()
+                state = self._state[key] = [now, 0, 0]  # inicio de ventana, emitidos, suprimidos
+            if now - state[0] >= self.per:
+                if state[2]:
+                    record.suppressed = state[2]
+                state[0], state[1], state[2] = now, 0, 0
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return bool(self.sample) and state[2] % self.sample == 0
+
+class SuppressedCountFormatter(logging.Formatter):
+    def format(self, record):
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{message} (+{suppressed} similares suprimidos)" if suppressed else message
+
+class JsonLinesFormatter(logging.Formatter):
+    """Una línea JSON compacta por registro, apta para ingestión posterior."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        metrics = getattr(record, 'metrics', None)
+        if metrics:
+            entry["metrics"] = metrics
+        if record.exc_info or record.exc_text:
+            entry["exc"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def _configure():
+    global _listener
+    level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    console = logging.StreamHandler()
+    console.setFormatter(SuppressedCountFormatter(_FORMAT))
+    handlers = [console]
+    json_path = os.getenv("LOG_JSON_PATH")
+    if json_path:
+        json_handler = logging.FileHandler(json_path, encoding="utf-8")
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(
+        burst=int(os.getenv("LOG_RATE_BURST", "10")),
+        per=float(os.getenv("LOG_RATE_WINDOW", "60")),
+        sample=int(os.getenv("LOG_RATE_SAMPLE", "0")),
+    ))
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Vacía la cola y detiene el hilo de escritura de logs."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
 
 def setup_logger():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[logging.StreamHandler()]
-    )
-    return logging.getLogger(__name__)
\ No newline at end of file
+    # Configuración única: las llamadas posteriores solo devuelven el logger
+    with _lock:
+        if _listener is None:
+            _configure()
+    return logging.getLogger(__name__)
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+
+MB = 1024 * 1024
+
+def rss_bytes():
+    """Memoria residente actual del proceso (Linux: /proc; otros: pico vía resource)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def candles_bytes(candles):
+    # Candle usa __slots__: tamaño fijo por vela más el puntero de la lista
+    return len(candles) * (sys.getsizeof(candles[0]) + 8) if candles else 0
+
+class MemoryComponent:
+    __slots__ = ("name", "sizer", "evict", "budget", "evictions")
+
+    def __init__(self, name, sizer, evict, budget):
+        self.name = name
+        self.sizer = sizer
+        self.evict = evict
+        self.budget = budget
+        self.evictions = 0
+
+class MemoryManager:
+    """
+    Presupuestos de memoria por componente (buffers de velas, cachés de features)
+    con desalojo al excederse, más muestreo periódico de RSS y, opcionalmente, de
+    tracemalloc con las líneas que más crecieron desde la muestra anterior. Cada
+    componente se registra con una función que estima su tamaño en bytes y otra
+    que libera memoria; los que no pueden desalojarse (el modelo servido) solo se
+    miden. El muestreo se exporta como log (campo 'metrics' en el log JSON) y
+    queda en `history` para consultas.
+    """
+
+    def __init__(self, budgets=None, interval=300.0, trace=False, trace_frames=1, top=10, history=288):
+        self.logger = logging.getLogger()
+        self.budgets = dict(budgets or {})
+        self.interval = interval
+        self.trace = trace
+        self.trace_frames = trace_frames
+        self.top = top
+        self.history = []
+        self.max_history = history
+        self.components = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_trace = None
+        self.baseline_rss = rss_bytes()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.memory_budgets, config.memory_sample_interval, config.memory_trace)
+
+    def register(self, name, sizer, evict=None, budget=None):
+        """
+        Registra un componente; el presupuesto (bytes) sale de `budgets` si no se indica.
+        Sin `evict` el componente solo se mide (no se desaloja al excederse).
+        """
+        with self._lock:
+            self.components[name] = MemoryComponent(name, sizer, evict, budget or self.budgets.get(name))
+
+    def usage(self):
+        sizes = {}
+        for name, component in list(self.components.items()):
+            try:
+                sizes[name] = int(component.sizer())
+            except Exception as e:
+                self.logger.warning(f"⚠️ No se pudo medir el componente {name}: {e}")
+        return sizes
+
+    def enforce(self):
+        """Desaloja los componentes que superan su presupuesto. Devuelve {componente: bytes liberados}."""
+        freed = {}
+        for name, size in self.usage().items():
+            component = self.components[name]
+            if component.evict is None or not component.budget or size <= component.budget:
+                continue
+            try:
+                component.evict()
+            except Exception as e:
+                self.logger.error(f"❌ Error al desalojar {name}: {e}")
+                continue
+            component.evictions += 1
+            # Algunos desalojos son diferidos (p. ej. el volcado del buffer en el hilo del stream)
+            freed[name] = max(0, size - int(component.sizer()))
+            self.logger.info("🧽 %s excedió su presupuesto (%.1f MB > %.1f MB); liberados %.1f MB",
+                             name, size / MB, component.budget / MB, freed[name] / MB)
+        return freed
+
+    def _top_growth(self):
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        previous, self._last_trace = self._last_trace, snapshot
+        if previous is None:
+            return []
+        return [{"where": str(stat.traceback[0]), "growth_kb": round(stat.size_diff / 1024, 1),
+                 "size_kb": round(stat.size / 1024, 1), "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(previous, "lineno")[:self.top] if stat.size_diff > 0]
+
+    def sample(self):
+        """Toma una muestra (RSS, tamaño por componente, crecimiento por línea) y la registra."""
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        rss = rss_bytes()
+        entry = {
+            "ts": time.time(),
+            "rss_mb": round(rss / MB, 1),
+            "rss_growth_mb": round((rss - self.baseline_rss) / MB, 1),
+            "components_mb": {name: round(size / MB, 2) for name, size in self.usage().items()},
+            "evictions": {name: c.evictions for name, c in self.components.items() if c.evictions},
+            "top_growth": self._top_growth(),
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            entry["traced_mb"] = round(current / MB, 1)
+            entry["traced_peak_mb"] = round(peak / MB, 1)
+        self.history.append(entry)
+        del self.history[:-self.max_history]
+        self.logger.info("📈 Memoria: RSS %.1f MB (%+.1f MB) | %s", entry["rss_mb"], entry["rss_growth_mb"],
+                         entry["components_mb"], extra={"metrics": {"memory": entry}})
+        for growth in entry["top_growth"][:3]:
+            self.logger.debug("🔎 Crecimiento %s: %+.1f KB", growth["where"], growth["growth_kb"])
+        return entry
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.enforce()
+            self.sample()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.sample()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
@@ -0,0 +1,64 @@
+import os
+import json
+import time
+import logging
+
+SNAPSHOT_FORMAT = 1
+
+class StateSnapshot:
+    """
+    Instantánea del estado de ejecución del bot (buffers de velas, marcos mayores,
+    modelo cargado, acumuladores del ciclo y posiciones abiertas) en un JSON local.
+    Se escribe de forma atómica (archivo temporal + fsync + os.replace), así un
+    corte a mitad de escritura nunca deja una instantánea a medias, y se restaura
+    al arrancar si no es más antigua que max_age.
+    """
+
+    def __init__(self, path, interval=30.0, max_age=600.0):
+        self.logger = logging.getLogger()
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.last_saved = 0.0
+
+    def save(self, state):
+        payload = dict(state, format=SNAPSHOT_FORMAT, saved_at=time.time())
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(payload, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.last_saved = payload["saved_at"]
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.error(f"❌ Error al guardar la instantánea de estado: {e}")
+            return False
+
+    def maybe_save(self, build_state):
+        """Guarda si pasó el intervalo; build_state se llama solo cuando corresponde."""
+        if time.time() - self.last_saved < self.interval:
+            return False
+        return self.save(build_state())
+
+    def load(self):
+        """Devuelve la instantánea vigente o None si no existe, es ilegible o está vencida."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️ Instantánea de estado ilegible, se ignora: {e}")
+            return None
+        if state.get("format") != SNAPSHOT_FORMAT:
+            self.logger.warning(f"⚠️ Formato de instantánea no soportado: {state.get('format')}")
+            return None
+        age = time.time() - state.get("saved_at", 0)
+        if age > self.max_age:
+            self.logger.info(f"🕰️ Instantánea de estado vencida ({int(age)} seg), arranque en frío")
+            return None
+        state["age"] = age
+        self.logger.info(f"♻️ Instantánea de estado de hace {int(age)} seg encontrada, arranque en caliente")
+        return state
@@ -1,24 +1,55 @@
 # utils/visual_logger.py
 import sys
 import time
+import threading
 
 class VisualLogger:
-    def __init__(self, refresh_interval=1):
+    def __init__(self, refresh_interval=1, stream=None):
         self.last_update = 0
         self.refresh_interval = refresh_interval  # Intervalo mínimo para refrescar (en segundos)
+        self.stream = stream or sys.stdout
+        # Solo se conserva el último mensaje pendiente; lo escribe un hilo aparte. La limpieza
+        # se encola aparte para que un update posterior no la descarte
+        self._pending = None
+        self._pending_clear = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._writer_loop, name="visual-logger", daemon=True)
+        self._thread.start()
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._pending_clear:
+                    self._cond.wait()
+                text, self._pending = self._pending or "", None
+                if self._pending_clear:
+                    text = "\r" + " " * 80 + "\r" + text
+                    self._pending_clear = False
+            try:
+                self.stream.write(text)
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _submit(self, text):
+        with self._cond:
+            self._pending = text
+            self._cond.notify()
 
     def update(self, message):
         """
         Actualiza en línea el mensaje en la consola.
         Solo se refresca si ha transcurrido al menos el refresh_interval.
+        La escritura ocurre en segundo plano: el ciclo nunca espera a la terminal.
         """
         current_time = time.time()
         if current_time - self.last_update >= self.refresh_interval:
-            sys.stdout.write("\r" + message)
-            sys.stdout.flush()
+            self._submit("\r" + message)
             self.last_update = current_time
 
     def clear(self):
-        """Limpia la línea actual."""
-        sys.stdout.write("\r" + " " * 80 + "\r")
-        sys.stdout.flush()
\ No newline at end of file
+        """Limpia la línea actual (descarta el mensaje pendiente, si lo hay)."""
+        with self._cond:
+            self._pending = None
+            self._pending_clear = True
+            self._cond.notify()